@@ -1,4 +1,4 @@
-def Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts):
+def Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts, return_stats=False):
 
     """ 
     The goal of this function is to solve the simple ambiguity resolution problem 
@@ -23,7 +23,17 @@ def Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts):
     variances" documents the assumed variances of the phase measurements; in the
     setting of Multiwavelength-EDM they are typically all equal. 
     A dictionary "optim_opts" collects further information pertaining to the 
-    optimization - like bounds and convergence criteria.
+    optimization - like bounds and convergence criteria. Its optional entry
+    "backend" selects the method of solution, see Setup_resolver; resolvers of
+    backends other than 'milp' are reused across calls of the same thread for
+    the eight most recently used configurations, see Config_key; lookup 
+    indices are shared by all threads. The optional entries 
+    "solver" and "solver_options" select the mixed integer solver, see 
+    Solver_arguments. The optional entry "verbose" (default False)
+    prints the output of the solver and the optional entry "callback" is 
+    called with the statistics of every solve, see Solver_statistics. If the
+    optional entry "cache" holds a Solution_cache, solutions of observations
+    whose phases have been resolved before are returned from the cache.
     
     Name                 Interpretation                             Type
     observations        Observations in the form of complex         c-vector [n_obs]
@@ -34,17 +44,23 @@ def Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts):
     phase_variances     Phase variances of the noise added onto     vector [n_obs]
                         the superposition of backscatter
     optim_options       The options for optimization                dictionary
+    return_stats        Also return the statistics of the solve     boolean
                         
                         
     OUTPUTS
     The outputs consist in the distance minimizing the l1 norm of residuals as well 
-    as the vector N of full wavecycles and the vector of residuals
+    as the vector N of full wavecycles and the vector of residuals. If return_
+    stats is True, the timings of all phases of the solve, the status of the
+    solver and its iteration and node counts are returned as well. A 
+    ValueError is raised if some observation is not finite.
     
     Name                 Interpretation                             Type
     d                  The optimally estimated distance             real number
     N                  A vector containing estimated full           integer vector [n_obs]
                        wavecycles
     r                  A vector containing unweighted residuals     vector [n_obs]
+    stats              Statistics of the solve, only if return_     dictionary
+                       stats is True
                           
     """
     
@@ -55,22 +71,37 @@ def Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts):
     """
     
     
-    # i) Import numerical and optimization libraries
+    # i) Dispatch to the cache and to alternative backends
+    
+    if optim_opts.get('cache') is not None:
+        return optim_opts['cache'].resolve(observations, wavelengths, phase_variances, optim_opts, return_stats)
+    
+    if optim_opts.get('backend','milp')!='milp':
+        resolver=_Memoized_resolver(wavelengths, phase_variances, optim_opts)
+        d,N,r=resolver.solve(observations)
+        return (d, N, r, getattr(resolver,'stats',None)) if return_stats else (d, N, r)
+    
+    
+    # ii) Import numerical and optimization libraries
     
     import numpy as np
     import cvxpy as cp
+    import time
     
+    t_start=time.perf_counter()
     
-    # ii) Define other quantities
+    
+    # iii) Define other quantities
     
     n_obs=len(observations)
     
     
-    # iii) Extract qunatities
+    # iv) Extract qunatities
     
     phi_obs=np.angle(observations)
-    max_iter=optim_opts['max_iter']
-    constraints=optim_opts['constraints']
+    _Check_phases(phi_obs)
+    solver,solver_args=Solver_arguments(optim_opts)
+    d_lower,d_upper,N_lower,N_upper,constraints=Compile_bounds(optim_opts, n_obs)
     
     
     
@@ -79,14 +110,10 @@ def Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts):
     """
     
     
-    # i) Coefficient matrices
-    
-    lambda_mat=np.diag(wavelengths)
-    lambda_mat_pinv=np.linalg.pinv(lambda_mat)
-    lambda_vec_pinv=np.diag(lambda_mat_pinv)
+    # i) Coefficient vectors, weighting is elementwise
     
-    phase_std=np.sqrt(phase_variances)
-    phase_std_pinv=np.linalg.pinv(np.diag(phase_std))
+    lambda_vec_pinv=Pseudo_reciprocal(wavelengths)
+    phase_weights=Pseudo_reciprocal(np.sqrt(phase_variances))
     
     
     # ii) Optimization variables
@@ -94,6 +121,8 @@ def Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts):
     d_opt=cp.Variable(nonneg=True)
     N_opt=cp.Variable(n_obs,integer=True)
     
+    t_assembly=time.perf_counter()
+    
     
     
     """
@@ -103,17 +132,21 @@ def Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts):
     
     # i) Objective function and constraints
     
-    objective=cp.Minimize(cp.norm(phase_std_pinv@(2*np.pi*(2*d_opt*lambda_vec_pinv-N_opt)-phi_obs),p=1))
+    objective=cp.Minimize(cp.norm(cp.multiply(phase_weights,2*np.pi*(2*d_opt*lambda_vec_pinv-N_opt)-phi_obs),p=1))
     
-    cons=[]
+    cons=_Bound_constraints(d_opt, N_opt, d_lower, d_upper, N_lower, N_upper)
     for cstr in constraints:
         cons=cons+[eval(cstr)]
     
+    t_constraints=time.perf_counter()
+    
     
     # ii) Solve optimization
     
     Optim_problem=cp.Problem(objective,constraints=cons)
-    Optim_solution=Optim_problem.solve(solver='GLPK_MI',max_iters=max_iter, verbose=True)
+    Optim_solution=Optim_problem.solve(solver=solver, verbose=optim_opts.get('verbose',False), **solver_args)
+    
+    t_solve=time.perf_counter()
     
     
     
@@ -132,6 +165,438 @@ def Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts):
     
     r=2*np.pi*(2*d*lambda_vec_pinv-N)-phi_obs
     
+    
+    # iii) Statistics of all phases
+    
+    t_end=time.perf_counter()
+    stats=Solver_statistics(Optim_problem, t_solve-t_constraints)
+    stats.update({'time_assembly' : t_assembly-t_start,
+                  'time_constraints' : t_constraints-t_assembly,
+                  'time_extraction' : t_end-t_solve,
+                  'time_total' : t_end-t_start})
+    
+    if optim_opts.get('callback') is not None:
+        optim_opts['callback'](stats)
+    
+    return (d, N, r, stats) if return_stats else (d, N, r)
+    
+    
+    
+    
+    
+    
+    
+class Base_resolver:
+    """ 
+    The goal of this class is to provide the method solve() shared by all
+    resolvers. The observed phases are extracted from the observations and
+    checked to be finite, the method _solve_phases of the derived class solves
+    for the distance and the wavecycles and the residuals are computed from
+    them. Derived classes implement _solve_phases(phi_obs) returning (d, N)
+    and set the attribute lambda_vec_pinv.
+    Unless a derived class records statistics of its own (records_stats), 
+    every solve is timed and its statistics are assembled in the form of 
+    Solver_statistics from the default status 'optimal' and the entries 
+    returned by the method _solve_info of the derived class. The statistics
+    are stored in the attribute stats and handed to the attribute callback.
+    
+    For this, do the following on each call to solve():
+        1. Extract phases and solve
+        2. Assemble results
+        
+    OUTPUTS
+    The method solve(observations) returns the same triple (d, N, r) as the
+    function Ambiguity_resolution. A ValueError is raised if some observation
+    is not finite.
+                          
+    """
+    
+    stats=None
+    callback=None
+    records_stats=False
+    
+    def solve(self, observations):
+        
+        """
+            1. Extract phases and solve --------------------------------------
+        """
+        
+        
+        # i) Import numerical libraries
+        
+        import numpy as np
+        
+        
+        # ii) Extract and check phases, solve
+        
+        phi_obs=np.angle(observations)
+        _Check_phases(phi_obs)
+        d,N=self._solve_recorded(phi_obs)
+        
+        
+        
+        """
+            2. Assemble results ----------------------------------------------
+        """
+        
+        
+        # i) Residuals
+        
+        r=2*np.pi*(2*d*self.lambda_vec_pinv-N)-phi_obs
+        
+        return d, N, r
+    
+    
+    def _solve_recorded(self, phi_obs):
+        
+        # Solve for extracted phases, time the solve and record its statistics
+        # unless _solve_phases records them itself
+        
+        import time
+        
+        if self.records_stats:
+            return self._solve_phases(phi_obs)
+        
+        t_start=time.perf_counter()
+        d,N=self._solve_phases(phi_obs)
+        time_solve=time.perf_counter()-t_start
+        
+        stats={'status' : 'optimal', 'n_solver_calls' : 0, 'time_canonicalization' : None,
+               'time_solver' : time_solve, 'time_solve_call' : time_solve,
+               'n_iterations' : None, 'n_nodes' : None}
+        stats.update(self._solve_info())
+        stats['time_total']=time.perf_counter()-t_start
+        stats['time_extraction']=stats['time_total']-(stats['time_solve_call'] or 0)
+        self.stats=stats
+        
+        if self.callback is not None:
+            self.callback(stats)
+        
+        return d, N
+    
+    
+    def _solve_info(self):
+        
+        # Entries of the statistics of the last solve reported by the backend
+        
+        return {}
+    
+    
+    
+    
+    
+    
+    
+class Ambiguity_resolver(Base_resolver):
+    """ 
+    The goal of this class is to solve the simple ambiguity resolution problem
+    repeatedly for observations that all share the same wavelengths, phase
+    variances and optimization options. The mixed integer linear program 
+    emulating the l1 norm minimization on the phase residuals is formulated 
+    only once during construction with the observed phases phi_obs entering
+    as a DPP-compliant cvxpy parameter. Subsequent calls to solve() only update
+    this parameter so that cvxpy can reuse the canonicalization of the problem.
+    
+    For this, do the following:
+        1. Definitions and imports
+        2. Assemble required matrices
+        3. Formulate optimization problem
+    and on each call to solve(), see Base_resolver:
+        4. Update parameter and perform optimization
+        
+    INPUTS
+    The inputs are the same as for the function Ambiguity_resolution except for
+    the observations which are only passed to solve(). The flag "verbose" is
+    handed over to the solver; if it is None, the entry "verbose" of optim_opts
+    is used (default False). The optional entry "callback" of optim_opts is 
+    called with the statistics of every solve.
+    
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    verbose             Print solver output if True                 boolean
+    
+    
+    OUTPUTS
+    The method solve(observations) returns the same triple (d, N, r) as the
+    function Ambiguity_resolution. The statistics of the last solve, see 
+    Solver_statistics, are stored in the attribute stats.
+                          
+    """
+    
+    records_stats=True
+    
+    def __init__(self, wavelengths, phase_variances, optim_opts, verbose=None):
+        
+        """
+            1. Definitions and imports ---------------------------------------
+        """
+        
+        
+        # i) Import numerical and optimization libraries
+        
+        import numpy as np
+        import cvxpy as cp
+        
+        
+        # ii) Define other quantities
+        
+        n_obs=len(wavelengths)
+        
+        
+        # iii) Extract quantities
+        
+        self.n_obs=n_obs
+        self.solver,self.solver_args=Solver_arguments(optim_opts)
+        self.verbose=optim_opts.get('verbose',False) if verbose is None else verbose
+        self.callback=optim_opts.get('callback')
+        self.stats=None
+        d_lower,d_upper,N_lower,N_upper,constraints=Compile_bounds(optim_opts, n_obs)
+        
+        
+        
+        """
+            2. Assemble required matrices ------------------------------------
+        """
+        
+        
+        # i) Coefficient vectors, weighting is elementwise
+        
+        self.lambda_vec_pinv=Pseudo_reciprocal(wavelengths)
+        self.phase_weights=Pseudo_reciprocal(np.sqrt(phase_variances))
+        
+        
+        # ii) Optimization variables and parameters
+        
+        d_opt=cp.Variable(nonneg=True)
+        N_opt=cp.Variable(n_obs,integer=True)
+        phi_obs=cp.Parameter(n_obs)
+        
+        
+        
+        """
+            3. Formulate optimization problem --------------------------------
+        """
+        
+        
+        # i) Objective function and constraints
+        
+        objective=cp.Minimize(cp.norm(cp.multiply(self.phase_weights,2*np.pi*(2*d_opt*self.lambda_vec_pinv-N_opt)-phi_obs),p=1))
+        
+        cons=_Bound_constraints(d_opt, N_opt, d_lower, d_upper, N_lower, N_upper)
+        for cstr in constraints:
+            cons=cons+[eval(cstr)]
+        
+        
+        # ii) Assemble problem
+        
+        self.d_opt=d_opt
+        self.N_opt=N_opt
+        self.phi_obs=phi_obs
+        self.problem=cp.Problem(objective,constraints=cons)
+        
+        
+    def _solve_phases(self, phi_obs):
+        
+        """
+            4. Update parameter and perform optimization ---------------------
+        """
+        
+        
+        # i) Solve for extracted phases and return optimization variables
+        
+        self._stats_start()
+        self.phi_obs.value=phi_obs
+        self._solve_problem(self.problem)
+        d,N=self.d_opt.value,self.N_opt.value
+        self._stats_finish()
+        
+        return d, N
+    
+    
+    def _solve_problem(self, problem, **kwargs):
+        
+        # Call the solver and accumulate the statistics of the current solve
+        
+        import time
+        
+        t_start=time.perf_counter()
+        problem.solve(solver=self.solver, verbose=self.verbose, **self.solver_args, **kwargs)
+        stats=Solver_statistics(problem, time.perf_counter()-t_start)
+        
+        for key in ['time_canonicalization', 'time_solver', 'time_solve_call', 'n_iterations', 'n_nodes']:
+            if stats[key] is not None:
+                self._stats_current[key]=(self._stats_current[key] or 0)+stats[key]
+        self._stats_current['status']=stats['status']
+        self._stats_current['n_solver_calls']+=1
+    
+    
+    def _stats_start(self):
+        
+        import time
+        
+        self._t_start=time.perf_counter()
+        self._stats_current={'status' : None, 'n_solver_calls' : 0, 'time_canonicalization' : None,
+                             'time_solver' : None, 'time_solve_call' : None,
+                             'n_iterations' : None, 'n_nodes' : None}
+    
+    
+    def _stats_finish(self):
+        
+        # Time outside of the solver calls is spent on extraction and overhead
+        
+        import time
+        
+        stats=self._stats_current
+        stats['time_total']=time.perf_counter()-self._t_start
+        stats['time_extraction']=stats['time_total']-(stats['time_solve_call'] or 0)
+        self.stats=stats
+        
+        if self.callback is not None:
+            self.callback(stats)
+    
+    
+    
+    
+    
+    
+    
+def Ambiguity_resolution_batch(observations, wavelengths, phase_variances, optim_opts, resolver=None, return_stats=False):
+
+    """ 
+    The goal of this function is to solve the simple ambiguity resolution problem
+    for a batch of n_pixels independent pixels that have all been measured with
+    the same sequence of wavelengths. All quantities that depend only on the 
+    wavelengths, the phase variances and the optimization options are computed
+    once and shared across the batch by means of a resolver, see Setup_resolver.
+    
+    For this, do the following:
+        1. Definitions and imports
+        2. Perform optimization for each pixel
+        3. Assemble results
+        
+    INPUTS
+    The inputs are the same as for the function Ambiguity_resolution except for
+    the observations which are now stacked into a matrix with one row per pixel.
+    Optionally, an already constructed resolver for the same configuration can
+    be passed to avoid formulating the problem again; otherwise the resolvers
+    of recently used configurations are reused as in Ambiguity_resolution. 
+    If return_stats is True,
+    the statistics of all solves are aggregated into histograms. If the entry
+    "cache" of optim_opts holds a Solution_cache, pixels whose phases have been
+    resolved before are not passed to the resolver. If the entry "dtype" of
+    optim_opts is 'float32', N and r are returned in single precision and the
+    residuals are computed by Residuals_batch in single precision; d is always
+    returned in double precision. A ValueError naming the pixels is raised if
+    the observations of some pixels are not finite.
+    
+    Name                 Interpretation                             Type
+    observations        Observations in the form of complex         c-matrix [n_pixels,n_obs]
+                        numbers, one row per pixel
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    resolver            Optional resolver built for the same        resolver object
+                        configuration
+    return_stats        Also return aggregated statistics           boolean
+                        
+                        
+    OUTPUTS
+    The outputs consist in the estimated distances, wavecycles and residuals of
+    all pixels.
+    
+    Name                 Interpretation                             Type
+    d                  The optimally estimated distances            vector [n_pixels]
+    N                  The estimated full wavecycles                matrix [n_pixels,n_obs]
+    r                  The unweighted residuals                     matrix [n_pixels,n_obs]
+    stats              Output of Aggregate_stats, only if           dictionary
+                       return_stats is True
+                          
+    """
+    
+    
+    
+    """
+        1. Definitions and imports -------------------------------------------
+    """
+    
+    
+    # i) Import numerical libraries
+    
+    import numpy as np
+    import time
+    
+    
+    # ii) Shared precomputation
+    
+    if resolver is None:
+        resolver=_Memoized_resolver(wavelengths, phase_variances, optim_opts)
+    
+    
+    # iii) Extract quantities
+    
+    phi_obs=np.angle(np.atleast_2d(observations))
+    _Check_phases(phi_obs)
+    n_pixels,n_obs=phi_obs.shape
+    dtype=optim_opts.get('dtype','float64')
+    
+    cache=optim_opts.get('cache')
+    if cache is not None:
+        solve_phases=cache._cached_solve(resolver, cache.config_key(wavelengths, phase_variances, optim_opts))
+    else:
+        solve_phases=resolver._solve_recorded
+    
+    
+    
+    """
+        2. Perform optimization for each pixel -------------------------------
+    """
+    
+    
+    # i) Initialize and fill results
+    
+    d=np.zeros([n_pixels])
+    N=np.zeros([n_pixels,n_obs],dtype=dtype)
+    
+    if not return_stats:
+        for k in range(n_pixels):
+            d[k],N[k,:]=solve_phases(phi_obs[k,:])
+    
+    
+    # ii) Record statistics, resolvers without own statistics are only timed
+    
+    else:
+        records=[]
+        for k in range(n_pixels):
+            t_start=time.perf_counter()
+            n_hits=cache.hits if cache is not None else 0
+            d[k],N[k,:]=solve_phases(phi_obs[k,:])
+            record={'time_total' : time.perf_counter()-t_start}
+            if cache is not None and cache.hits>n_hits:
+                record['status']='cached'
+            else:
+                record.update(getattr(resolver,'stats',None) or {})
+            records.append(record)
+    
+    
+    
+    """
+        3. Assemble results --------------------------------------------------
+    """
+    
+    
+    # i) Residuals for all pixels at once
+    
+    r=Residuals_batch(d, N, phi_obs, resolver.lambda_vec_pinv, dtype)
+    
+    if return_stats:
+        return d, N, r, Aggregate_stats(records)
+    
     return d, N, r
     
     
@@ -140,6 +605,1794 @@ def Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts):
     
     
     
+def Ambiguity_resolution_parallel(observations, wavelengths, phase_variances, optim_opts, n_workers=None, chunk_size=64, return_stats=False):
+
+    """ 
+    The goal of this function is to solve the simple ambiguity resolution problem
+    for a batch of pixels by distributing the solves across a pool of processes.
+    The batch is split into chunks of consecutive pixels which are handed to the
+    workers of a concurrent.futures process pool. Every worker sets up its 
+    resolver once upon startup and reuses it for all chunks it handles.
+    The results are returned in the order of the input.
+    
+    For this, do the following:
+        1. Definitions and imports
+        2. Distribute chunks across workers
+        3. Assemble results
+        
+    INPUTS
+    The inputs are the same as for the function Ambiguity_resolution_batch 
+    complemented by the number of worker processes and the chunk size. When
+    this function is called from a script, the call has to be protected by
+    an if __name__=='__main__' clause as required by process pools. The entry
+    "callback" of optim_opts is not passed on to the workers; the statistics 
+    of all solves are aggregated across workers if return_stats is True.
+    
+    Name                 Interpretation                             Type
+    observations        Observations in the form of complex         c-matrix [n_pixels,n_obs]
+                        numbers, one row per pixel
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    n_workers           Number of worker processes, defaults to     positive integer
+                        the number of cores
+    chunk_size          Number of pixels sent to a worker at once   positive integer
+    return_stats        Also return aggregated statistics           boolean
+                        
+                        
+    OUTPUTS
+    The outputs are the same as for the function Ambiguity_resolution_batch.
+    
+    Name                 Interpretation                             Type
+    d                  The optimally estimated distances            vector [n_pixels]
+    N                  The estimated full wavecycles                matrix [n_pixels,n_obs]
+    r                  The unweighted residuals                     matrix [n_pixels,n_obs]
+    stats              Output of Aggregate_stats, only if           dictionary
+                       return_stats is True
+                          
+    """
+    
+    
+    
+    """
+        1. Definitions and imports -------------------------------------------
+    """
+    
+    
+    # i) Import numerical and multiprocessing libraries
+    
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor
+    
+    
+    # ii) Split observations into chunks
+    
+    observations=np.atleast_2d(observations)
+    n_pixels=observations.shape[0]
+    chunks=[observations[k:k+chunk_size,:] for k in range(0,n_pixels,chunk_size)]
+    optim_opts=dict(optim_opts, callback=None)
+    
+    
+    # iii) Empty batches need no workers
+    
+    if len(chunks)==0:
+        n_obs=len(wavelengths)
+        dtype=optim_opts.get('dtype','float64')
+        d=np.zeros([0])
+        N=np.zeros([0,n_obs],dtype=dtype)
+        r=np.zeros([0,n_obs],dtype=dtype)
+        if return_stats:
+            return d, N, r, Aggregate_stats([])
+        return d, N, r
+    
+    
+    
+    """
+        2. Distribute chunks across workers ----------------------------------
+    """
+    
+    
+    # i) Solve chunks, map preserves the order of the input
+    
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_Init_parallel_worker,
+                             initargs=(wavelengths, phase_variances, optim_opts)) as executor:
+        results=list(executor.map(_Resolve_parallel_chunk, chunks, [return_stats]*len(chunks)))
+    
+    
+    
+    """
+        3. Assemble results --------------------------------------------------
+    """
+    
+    
+    # i) Concatenate chunks
+    
+    d=np.concatenate([result[0] for result in results])
+    N=np.concatenate([result[1] for result in results],axis=0)
+    r=np.concatenate([result[2] for result in results],axis=0)
+    
+    if return_stats:
+        return d, N, r, Aggregate_stats([record for result in results for record in result[3]['records']])
+    
+    return d, N, r
+
+
+
+class Enumeration_resolver(Base_resolver):
+    """ 
+    The goal of this class is to solve the simple ambiguity resolution problem
+    exactly without recourse to mixed integer programming. For a fixed distance
+    d, the optimal wavecycles N are obtained by rounding and the l1 norm of the
+    phase residuals is a continuous, piecewise linear function of d. Its minimum
+    is therefore attained either at a bound of d or at one of the phase wrap 
+    points d = lambda_i*(N_i + phi_i/2pi)/2 where one of the residuals vanishes.
+    All wrap points inside the bounds are enumerated and the objective function
+    is evaluated for them in a vectorized sweep.
+    
+    For this, do the following:
+        1. Definitions and imports
+        2. Assemble required vectors
+        3. Enumerate admissible wavecycles
+    and on each call to solve(), see Base_resolver:
+        4. Enumerate and evaluate wrap points
+        
+    INPUTS
+    The inputs are the same as for the class Ambiguity_resolver. The bounds on d
+    and N are compiled from optim_opts by Compile_bounds; an upper bound on d
+    is required. The optional entry "chunk_size" of optim_opts limits the number
+    of wrap points that are evaluated at once.
+    
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    
+    
+    OUTPUTS
+    The method solve(observations) returns the same triple (d, N, r) as the
+    function Ambiguity_resolution. The statistics of the last solve are 
+    recorded by Base_resolver.
+                          
+    """
+    
+    def __init__(self, wavelengths, phase_variances, optim_opts):
+        
+        """
+            1. Definitions and imports ---------------------------------------
+        """
+        
+        
+        # i) Import numerical libraries
+        
+        import numpy as np
+        
+        
+        # ii) Extract quantities
+        
+        self.n_obs=len(wavelengths)
+        self.chunk_size=optim_opts.get('chunk_size',4096)
+        self.callback=optim_opts.get('callback')
+        d_lower,d_upper,N_lower,N_upper,_=Compile_bounds(optim_opts, self.n_obs, strict=True)
+        
+        if not np.isfinite(d_upper):
+            raise ValueError('Enumeration requires an upper bound on d_opt, e.g. constraints=[\'d_opt<=20\']')
+        
+        self.d_lower=d_lower
+        self.d_upper=d_upper
+        self.N_lower=N_lower
+        self.N_upper=N_upper
+        
+        
+        
+        """
+            2. Assemble required vectors -------------------------------------
+        """
+        
+        
+        # i) Coefficient vectors
+        
+        self.wavelengths=np.asarray(wavelengths, dtype=float)
+        
+        self.lambda_vec_pinv=Pseudo_reciprocal(wavelengths)
+        self.phase_weights=Pseudo_reciprocal(np.sqrt(phase_variances))
+        
+        
+        
+        """
+            3. Enumerate admissible wavecycles -------------------------------
+        """
+        
+        
+        # i) Wavecycles whose wrap points can fall inside the bounds of d
+        
+        N_min=np.maximum(np.floor(2*d_lower*self.lambda_vec_pinv-0.5),N_lower)
+        N_max=np.minimum(np.ceil(2*d_upper*self.lambda_vec_pinv+0.5),N_upper)
+        n_cycles=np.maximum(N_max-N_min+1,0).astype(int)
+        
+        self.cand_index=np.repeat(np.arange(self.n_obs),n_cycles)
+        self.cand_N=np.concatenate([np.arange(N_min[k],N_max[k]+1) for k in range(self.n_obs)])
+        
+        
+    def _solve_phases(self, phi_obs):
+        
+        """
+            4. Enumerate and evaluate wrap points ----------------------------
+        """
+        
+        
+        # i) Candidate distances: bounds and wrap points inside the bounds
+        
+        import numpy as np
+        
+        phi_frac=phi_obs/(2*np.pi)
+        d_cand=0.5*self.wavelengths[self.cand_index]*(self.cand_N+phi_frac[self.cand_index])
+        d_cand=d_cand[(d_cand>=self.d_lower)&(d_cand<=self.d_upper)]
+        d_cand=np.concatenate(([self.d_lower,self.d_upper],d_cand))
+        
+        # ii) Vectorized sweep over chunks of candidates, N optimal for each d
+        
+        obj_best=np.inf
+        for k in range(0,len(d_cand),self.chunk_size):
+            d_chunk=d_cand[k:k+self.chunk_size]
+            cycles=2*d_chunk[:,np.newaxis]*self.lambda_vec_pinv[np.newaxis,:]-phi_frac[np.newaxis,:]
+            N_chunk=np.clip(np.round(cycles),self.N_lower,self.N_upper)
+            obj_chunk=2*np.pi*np.abs(cycles-N_chunk)@self.phase_weights
+            
+            k_min=np.argmin(obj_chunk)
+            if obj_chunk[k_min]<obj_best:
+                obj_best=obj_chunk[k_min]
+                d=d_chunk[k_min]
+                N=N_chunk[k_min,:]
+        
+        return d, N
+    
+    
+    
+    
+    
+    
+    
+class Streaming_resolver(Ambiguity_resolver):
+    """ 
+    The goal of this class is to resolve ambiguities for streams of temporally
+    or spatially correlated pixels whose distances change only little from one
+    solve to the next. The previous solution (d, N) serves as a hint: the 
+    mixed integer linear program is restricted to a window of distances around
+    the hint together with the wavecycles compatible with this window, which
+    shrinks the search tree. If the weighted l1 norm of the residuals exceeds
+    a threshold, the window is doubled until it covers the admissible range 
+    of distances or has been widened a maximum number of times, in which case
+    the unrestricted problem is solved. An upper bound on d is required as the window could otherwise
+    grow without end and the unrestricted problem can be intractable.
+    
+    For this, do the following:
+        1. Definitions and imports
+        2. Formulate restricted optimization problem
+    and on each call to solve():
+        3. Solve in windows of growing size
+        
+    INPUTS
+    The inputs are the same as for the class Ambiguity_resolver; an upper bound
+    on d is required. The optional entries "stream_window" (default shortest
+    wavelength), "stream_threshold" (default 2*n_obs) and "stream_max_
+    widenings" (default 8) of optim_opts set the initial half width of the 
+    window of distances, the bound on the l1 norm of the residuals weighted by
+    the inverse phase standard deviations and the number of widenings after 
+    which the unrestricted problem is solved. The method solve accepts an 
+    optional hint (d, N) overriding the previous solution.
+    
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    verbose             Print solver output if True                 boolean
+    
+    
+    OUTPUTS
+    The method solve(observations, hint=None) returns the same triple (d, N, r)
+    as the function Ambiguity_resolution. The attribute n_widened counts how 
+    often a window had to be widened.
+                          
+    """
+    
+    def __init__(self, wavelengths, phase_variances, optim_opts, verbose=None):
+        
+        """
+            1. Definitions and imports ---------------------------------------
+        """
+        
+        
+        # i) Import numerical and optimization libraries
+        
+        import numpy as np
+        import cvxpy as cp
+        
+        
+        # ii) Unrestricted problem
+        
+        super().__init__(wavelengths, phase_variances, optim_opts, verbose)
+        self.problem_full=self.problem
+        
+        
+        # iii) Extract quantities
+        
+        self.d_lower,self.d_upper,_,_,_=Compile_bounds(optim_opts, self.n_obs)
+        
+        if not np.isfinite(self.d_upper):
+            raise ValueError('Streaming resolution requires an upper bound on d_opt, e.g. constraints=[\'d_opt<=20\']')
+        
+        self.window=optim_opts.get('stream_window',np.min(wavelengths))
+        self.threshold=optim_opts.get('stream_threshold',2*self.n_obs)
+        self.max_widenings=optim_opts.get('stream_max_widenings',8)
+        self.hint=None
+        self.n_widened=0
+        
+        
+        
+        """
+            2. Formulate restricted optimization problem ---------------------
+        """
+        
+        
+        # i) Window parameters
+        
+        self.d_window_lower=cp.Parameter()
+        self.d_window_upper=cp.Parameter()
+        self.N_window_lower=cp.Parameter(self.n_obs)
+        self.N_window_upper=cp.Parameter(self.n_obs)
+        
+        
+        # ii) Restricted problem
+        
+        cons_window=[self.d_opt>=self.d_window_lower, self.d_opt<=self.d_window_upper,
+                     self.N_opt>=self.N_window_lower, self.N_opt<=self.N_window_upper]
+        self.problem=cp.Problem(self.problem_full.objective, constraints=self.problem_full.constraints+cons_window)
+        
+        
+    def solve(self, observations, hint=None):
+        
+        # Replace the previous solution by the hint if provided
+        
+        if hint is not None:
+            self.hint=hint
+        
+        return super().solve(observations)
+    
+    
+    def _solve_phases(self, phi_obs):
+        
+        # Statistics accumulate over all windows of one solve
+        
+        self._stats_start()
+        d,N=self._solve_windows(phi_obs)
+        self._stats_finish()
+        
+        return d, N
+    
+    
+    def _solve_windows(self, phi_obs):
+        
+        """
+            3. Solve in windows of growing size ------------------------------
+        """
+        
+        
+        # i) Import numerical libraries
+        
+        import numpy as np
+        
+        
+        # ii) Solve unrestricted problem without a hint
+        
+        if self.hint is None:
+            return self._solve_full(phi_obs)
+        
+        d_hint=self.hint[0]
+        half_width=self.window
+        n_windows=0
+        
+        
+        # iii) Restrict to window and check residuals
+        
+        while n_windows<=self.max_widenings and (d_hint-half_width>self.d_lower or d_hint+half_width<self.d_upper):
+            d_window_lower=max(self.d_lower,d_hint-half_width)
+            d_window_upper=min(self.d_upper,d_hint+half_width)
+            
+            self.phi_obs.value=phi_obs
+            self.d_window_lower.value=d_window_lower
+            self.d_window_upper.value=d_window_upper
+            self.N_window_lower.value=np.floor(2*d_window_lower*self.lambda_vec_pinv)-1
+            self.N_window_upper.value=np.ceil(2*d_window_upper*self.lambda_vec_pinv)+1
+            
+            self._solve_problem(self.problem)
+            d,N=self.d_opt.value,self.N_opt.value
+            
+            if d is not None and N is not None:
+                objective=np.sum(self.phase_weights*np.abs(2*np.pi*(2*d*self.lambda_vec_pinv-N)-phi_obs))
+                if objective<=self.threshold:
+                    self.hint=(d,N)
+                    return d, N
+            
+            half_width=2*half_width
+            n_windows+=1
+            self.n_widened+=1
+        
+        
+        # iv) Window covers all admissible distances or was widened too often
+        
+        return self._solve_full(phi_obs)
+    
+    
+    def _solve_full(self, phi_obs):
+        
+        # Unrestricted problem, solution becomes the next hint
+        
+        self.phi_obs.value=phi_obs
+        self._solve_problem(self.problem_full)
+        self.hint=(self.d_opt.value,self.N_opt.value)
+        
+        return self.d_opt.value, self.N_opt.value
+    
+    
+    
+    
+    
+    
+    
+class Sparse_MILP_resolver(Base_resolver):
+    """ 
+    The goal of this class is to solve the mixed integer linear program of the
+    function Ambiguity_resolution without the modeling layer of cvxpy. The l1
+    norm is reformulated via its epigraph with slack variables t so that the
+    program reads
+    
+        min sum(t)  s.t.  -t <= W(2*pi*(2*d*lambda^-1 - N) - phi_obs) <= t
+    
+    in the variables x=[d, N, t] with W the diagonal matrix of inverse phase 
+    standard deviations. The vector c, the sparse matrix A_ub, the bounds and the
+    integrality indicators only depend on the wavelengths and variances and are
+    assembled once; each solve only updates b_ub and calls 
+    scipy.optimize.milp, i.e. HiGHS, directly.
+    
+    For this, do the following:
+        1. Definitions and imports
+        2. Assemble template of the linear program
+    and on each call to solve(), see Base_resolver:
+        3. Update right hand side and perform optimization
+        
+    INPUTS
+    The inputs are the same as for the class Ambiguity_resolver. Only bounds on
+    d and N are supported as constraints, see Compile_bounds. The keys 
+    'time_limit' and 'mip_gap' of the entry "solver_options" of optim_opts are
+    passed on to scipy.optimize.milp together with its other native options;
+    'threads' is dropped as scipy.optimize.milp does not expose it.
+    
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    
+    
+    OUTPUTS
+    The method solve(observations) returns the same triple (d, N, r) as the
+    function Ambiguity_resolution. The statistics of the last solve, see 
+    Base_resolver, report the status of scipy.optimize.milp in the terms of
+    cvxpy together with its node count and the entry 'mip_gap'.
+                          
+    """
+    
+    def __init__(self, wavelengths, phase_variances, optim_opts):
+        
+        """
+            1. Definitions and imports ---------------------------------------
+        """
+        
+        
+        # i) Import numerical and optimization libraries
+        
+        import numpy as np
+        import scipy.sparse as sparse
+        from scipy.optimize import Bounds, LinearConstraint
+        
+        
+        # ii) Extract quantities
+        
+        n_obs=len(wavelengths)
+        self.n_obs=n_obs
+        self.callback=optim_opts.get('callback')
+        d_lower,d_upper,N_lower,N_upper,_=Compile_bounds(optim_opts, n_obs, strict=True)
+        
+        translation={'mip_gap' : 'mip_rel_gap'}
+        self.milp_options={translation.get(key,key) : value for key,value in (optim_opts.get('solver_options') or {}).items()
+                           if key!='threads'}
+        
+        
+        
+        """
+            2. Assemble template of the linear program -----------------------
+        """
+        
+        
+        # i) Coefficient vectors
+        
+        self.lambda_vec_pinv=Pseudo_reciprocal(wavelengths)
+        self.phase_weights=Pseudo_reciprocal(np.sqrt(phase_variances))
+        
+        
+        # ii) Objective and inequalities A_ub x <= b_ub for x=[d, N, t]
+        
+        w=self.phase_weights
+        identity=sparse.identity(n_obs,format='csr')
+        A_res=sparse.hstack([sparse.csr_matrix((4*np.pi*w*self.lambda_vec_pinv)[:,np.newaxis]),
+                             sparse.diags(-2*np.pi*w)])
+        A_ub=sparse.vstack([sparse.hstack([A_res,-identity]),
+                            sparse.hstack([-A_res,-identity])],format='csr')
+        
+        self.c=np.concatenate((np.zeros([n_obs+1]),np.ones([n_obs])))
+        self.A_ub=A_ub
+        self.b_lower=-np.inf*np.ones([2*n_obs])
+        self.LinearConstraint=LinearConstraint
+        
+        
+        # iii) Bounds and integrality. For fixed d, the optimal N_i is the 
+        # nearest integer to 2*d/lambda_i-phi_i/(2*pi), which lies in the 
+        # interval [2*d/lambda_i-0.5, 2*d/lambda_i+0.5]; its nearest integer is
+        # within one cycle of 2*d/lambda_i. Only if all these integers are 
+        # admissible, each residual of an optimal solution is at most pi.
+        
+        t_upper=np.inf*np.ones([n_obs])
+        
+        if np.isfinite(d_upper):
+            N_round_lower=np.ceil(2*d_lower*self.lambda_vec_pinv-1)
+            N_round_upper=np.floor(2*d_upper*self.lambda_vec_pinv+1)
+            if np.all(N_lower<=N_round_lower) and np.all(N_upper>=N_round_upper):
+                t_upper=np.pi*w
+            N_lower=np.maximum(N_lower,N_round_lower)
+            N_upper=np.minimum(N_upper,N_round_upper)
+        
+        self.bounds=Bounds(np.concatenate(([d_lower],N_lower,np.zeros([n_obs]))),
+                           np.concatenate(([d_upper],N_upper,t_upper)))
+        self.integrality=np.concatenate(([0],np.ones([n_obs]),np.zeros([n_obs])))
+        
+        
+    def _solve_phases(self, phi_obs):
+        
+        """
+            3. Update right hand side and perform optimization ---------------
+        """
+        
+        
+        # i) Only the right hand side depends on the observations
+        
+        import numpy as np
+        import time
+        from scipy.optimize import milp
+        
+        b_ub=np.concatenate((self.phase_weights*phi_obs,-self.phase_weights*phi_obs))
+        constraints=self.LinearConstraint(self.A_ub,self.b_lower,b_ub)
+        
+        t_start=time.perf_counter()
+        result=milp(self.c, constraints=constraints, integrality=self.integrality,
+                    bounds=self.bounds, options=self.milp_options)
+        self._result=result
+        self._time_solve_call=time.perf_counter()-t_start
+        
+        if result.x is None:
+            raise RuntimeError('scipy.optimize.milp failed: {}'.format(result.message))
+        
+        return result.x[0], np.round(result.x[1:self.n_obs+1])
+    
+    
+    def _solve_info(self):
+        
+        # Status of scipy.optimize.milp in the terms of cvxpy, node count and gap
+        
+        statuses={0 : 'optimal', 1 : 'user_limit', 2 : 'infeasible', 3 : 'unbounded'}
+        
+        return {'status' : statuses.get(self._result.status,'solver_error'),
+                'n_solver_calls' : 1,
+                'time_solve_call' : self._time_solve_call,
+                'time_solver' : self._time_solve_call,
+                'n_nodes' : getattr(self._result,'mip_node_count',None),
+                'mip_gap' : getattr(self._result,'mip_gap',None)}
+    
+    
+    
+    
+    
+    
+    
+class Fast_path_resolver(Base_resolver):
+    """ 
+    The goal of this class is to resolve ambiguities in closed form whenever the
+    observations permit it and to fall back to another backend otherwise. The 
+    closed form solution is obtained by hierarchical unwrapping with synthetic
+    wavelengths: The phase differences of neighboring wavelengths behave like
+    phases observed with the beat wavelengths Lambda=lambda_i*lambda_j/|lambda_i
+    -lambda_j|. Starting from the longest of all beat and original wavelengths,
+    the distance is estimated unambiguously and then refined level by level 
+    down to the shortest wavelength, which takes O(n_obs) operations. The 
+    wavecycles N follow by rounding and d is finally set to the l1 optimal 
+    distance for these N. If the weighted l1 norm of the residuals exceeds a
+    threshold, the solution is discarded and the fallback backend is used.
+    
+    The closed form solution is only attempted if half of the longest synthetic
+    wavelength covers the admissible range of distances; otherwise all calls are
+    passed on to the fallback backend.
+    
+    For this, do the following:
+        1. Definitions and imports
+        2. Assemble required vectors
+        3. Assemble hierarchy of wavelengths
+    and on each call to solve(), see Base_resolver:
+        4. Unwrap hierarchically and check residuals
+        
+    INPUTS
+    The inputs are the same as for the class Ambiguity_resolver. The bounds on d
+    and N are compiled from optim_opts by Compile_bounds. The optional entries
+    "fast_path_threshold" (default 2*n_obs) and "fallback" (default 'milp') of
+    optim_opts set the bound on the l1 norm of the residuals weighted by the 
+    inverse phase standard deviations and the backend used if it is exceeded.
+    
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    
+    
+    OUTPUTS
+    The method solve(observations) returns the same triple (d, N, r) as the
+    function Ambiguity_resolution. The attributes n_fast and n_fallback count
+    how often either path has been taken. The statistics of the last solve, 
+    see Base_resolver, have the status 'heuristic' for the closed form 
+    solution and are those of the fallback backend otherwise.
+                          
+    """
+    
+    def __init__(self, wavelengths, phase_variances, optim_opts):
+        
+        """
+            1. Definitions and imports ---------------------------------------
+        """
+        
+        
+        # i) Import numerical libraries
+        
+        import numpy as np
+        
+        
+        # ii) Extract quantities
+        
+        self.n_obs=len(wavelengths)
+        self.threshold=optim_opts.get('fast_path_threshold',2*self.n_obs)
+        self.fallback_opts=dict(optim_opts, backend=optim_opts.get('fallback','milp'), callback=None)
+        self.fallback=None
+        self.callback=optim_opts.get('callback')
+        self.n_fast=0
+        self.n_fallback=0
+        
+        self.wavelengths=np.asarray(wavelengths, dtype=float)
+        self.phase_variances=phase_variances
+        d_lower,d_upper,N_lower,N_upper,_=Compile_bounds(optim_opts, self.n_obs, strict=True)
+        self.d_lower=d_lower
+        self.d_upper=d_upper
+        self.N_lower=N_lower
+        self.N_upper=N_upper
+        
+        
+        
+        """
+            2. Assemble required vectors -------------------------------------
+        """
+        
+        
+        # i) Coefficient vectors
+        
+        self.lambda_vec_pinv=Pseudo_reciprocal(wavelengths)
+        self.phase_weights=Pseudo_reciprocal(np.sqrt(phase_variances))
+        
+        
+        
+        """
+            3. Assemble hierarchy of wavelengths -----------------------------
+        """
+        
+        
+        # i) Beat wavelengths of neighbors after sorting, phase of level is
+        # phi[index_plus]-phi[index_minus]
+        
+        order=np.argsort(-self.wavelengths)
+        lambda_sorted=self.wavelengths[order]
+        lambda_diff=lambda_sorted[:-1]-lambda_sorted[1:]
+        is_distinct=lambda_diff>0
+        
+        lambda_beat=lambda_sorted[:-1][is_distinct]*lambda_sorted[1:][is_distinct]/lambda_diff[is_distinct]
+        index_plus=np.concatenate((order[1:][is_distinct],order))
+        index_minus=np.concatenate((order[:-1][is_distinct],-np.ones([self.n_obs],dtype=int)))
+        lambda_levels=np.concatenate((lambda_beat,self.wavelengths[order]))
+        
+        
+        # ii) Sort levels from coarse to fine
+        
+        order_levels=np.argsort(-lambda_levels,kind='stable')
+        self.lambda_levels=lambda_levels[order_levels]
+        self.index_plus=index_plus[order_levels]
+        self.index_minus=index_minus[order_levels]
+        
+        self.fast_available=self.lambda_levels[0]/2>=self.d_upper-self.d_lower
+        
+        
+    def _solve_phases(self, phi_obs):
+        
+        """
+            4. Unwrap hierarchically and check residuals ---------------------
+        """
+        
+        
+        # i) Closed form solution, fallback if unavailable or implausible
+        
+        import numpy as np
+        
+        if self.fast_available:
+            d,N,objective=self._unwrap(phi_obs)
+            if objective<=self.threshold:
+                self.n_fast+=1
+                self._used_fallback=False
+                return d, N
+        
+        if self.fallback is None:
+            self.fallback=Setup_resolver(self.wavelengths, self.phase_variances, self.fallback_opts)
+        self.n_fallback+=1
+        self._used_fallback=True
+        
+        return self.fallback._solve_recorded(phi_obs)
+    
+    
+    def _solve_info(self):
+        
+        # The closed form solution is plausible but not certified, the fallback
+        # reports its own statistics
+        
+        if not self._used_fallback:
+            return {'status' : 'heuristic'}
+        
+        return {key : value for key,value in self.fallback.stats.items() if key not in ['time_total','time_extraction']}
+    
+    
+    def _unwrap(self, phi_obs):
+        
+        # Phases of all levels as fractions of a full cycle in [0,1)
+        
+        import numpy as np
+        
+        phi_plus=phi_obs[self.index_plus]
+        phi_minus=np.where(self.index_minus>=0,phi_obs[self.index_minus],0)
+        frac_levels=np.mod((phi_plus-phi_minus)/(2*np.pi),1)
+        
+        # Coarsest level is unambiguous within the bounds, refine level by level
+        
+        half_range=self.lambda_levels[0]/2
+        d=self.d_lower+np.mod(half_range*frac_levels[0]-self.d_lower,half_range)
+        
+        for k in range(1,len(self.lambda_levels)):
+            N_level=np.round(2*d/self.lambda_levels[k]-frac_levels[k])
+            d=0.5*self.lambda_levels[k]*(N_level+frac_levels[k])
+        
+        # Wavecycles by rounding, d as l1 optimum for fixed N
+        
+        N=np.clip(np.round(2*d*self.lambda_vec_pinv-phi_obs/(2*np.pi)),self.N_lower,self.N_upper)
+        d=Optimal_distance(N, phi_obs, self.wavelengths, self.phase_weights, self.d_lower, self.d_upper)
+        objective=np.sum(self.phase_weights*np.abs(2*np.pi*(2*d*self.lambda_vec_pinv-N)-phi_obs))
+        
+        return d, N, objective
+    
+    
+    
+    
+    
+    
+    
+class Coarse_to_fine_resolver(Base_resolver):
+    """ 
+    The goal of this class is to solve the simple ambiguity resolution problem
+    by a deterministic global search over the distance. For a fixed distance d,
+    the optimal wavecycles N follow by rounding and the objective, i.e. the 
+    weighted l1 norm of the phase residuals, is the sum of the terms 
+    2*pi*w_i*|2*d/lambda_i - phi_i/2pi - N_i| each of which is Lipschitz 
+    continuous in d with constant L_i=4*pi*w_i/lambda_i. The objective is first
+    swept over a coarse grid whose spacing h is a fraction of half the shortest
+    wavelength. On every cell [a, b] of the grid, term i is bounded from below 
+    by (f_i(a)+f_i(b)-L_i*h)/2 and by 0. The top-k cells ranked by these lower
+    bounds are refined exactly: As the objective is piecewise linear, its 
+    minimum on a cell is attained at an end point or at a point where one of 
+    the residuals vanishes, and since h is shorter than half of each 
+    wavelength, there is at most one such point per wavelength and cell. 
+    Refinement continues round by round with the next top-k cells until no 
+    unrefined cell can contain a better solution, which certifies the global 
+    optimum, or until a maximum number of rounds is reached. The difference 
+    between the best objective value and the smallest lower bound of all 
+    unrefined cells is returned as the certificate gap.
+    
+    For this, do the following:
+        1. Definitions and imports
+        2. Assemble required vectors
+        3. Assemble coarse grid
+    and on each call to solve(), see Base_resolver:
+        4. Sweep coarse grid and refine top-k cells
+        
+    INPUTS
+    The inputs are the same as for the class Ambiguity_resolver. The bounds on d
+    and N are compiled from optim_opts by Compile_bounds; an upper bound on d
+    is required. The optional entries "c2f_oversampling" (default 2) sets the
+    number of grid cells per half of the shortest wavelength, "c2f_top_k" 
+    (default 16) the number of cells refined per round, "c2f_max_rounds" 
+    (default 64) the maximum number of rounds, "c2f_tolerance" (default 0) the
+    certificate gap at which refinement stops and "chunk_size" (default 4096)
+    the number of grid points swept at once.
+    
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    
+    
+    OUTPUTS
+    The method solve(observations) returns the same triple (d, N, r) as the
+    function Ambiguity_resolution, the method solve_certified(observations) 
+    returns the quadruple (d, N, r, gap). The certificate gap of the last solve
+    is also stored in the attribute gap; it is 0 if d is globally optimal. The
+    statistics of the last solve, see Base_resolver, contain the gap and have
+    the status 'optimal' only if the gap is 0.
+                          
+    """
+    
+    def __init__(self, wavelengths, phase_variances, optim_opts):
+        
+        """
+            1. Definitions and imports ---------------------------------------
+        """
+        
+        
+        # i) Import numerical libraries
+        
+        import numpy as np
+        
+        
+        # ii) Extract quantities
+        
+        self.n_obs=len(wavelengths)
+        self.top_k=optim_opts.get('c2f_top_k',16)
+        self.max_rounds=optim_opts.get('c2f_max_rounds',64)
+        self.tolerance=optim_opts.get('c2f_tolerance',0)
+        self.chunk_size=optim_opts.get('chunk_size',4096)
+        self.callback=optim_opts.get('callback')
+        oversampling=optim_opts.get('c2f_oversampling',2)
+        d_lower,d_upper,N_lower,N_upper,_=Compile_bounds(optim_opts, self.n_obs, strict=True)
+        
+        if not np.isfinite(d_upper):
+            raise ValueError('Coarse to fine search requires an upper bound on d_opt, e.g. constraints=[\'d_opt<=20\']')
+        
+        self.d_lower=d_lower
+        self.d_upper=d_upper
+        self.N_lower=N_lower
+        self.N_upper=N_upper
+        self.gap=None
+        
+        
+        
+        """
+            2. Assemble required vectors -------------------------------------
+        """
+        
+        
+        # i) Coefficient vectors
+        
+        self.wavelengths=np.asarray(wavelengths, dtype=float)
+        
+        self.lambda_vec_pinv=Pseudo_reciprocal(wavelengths)
+        self.phase_weights=Pseudo_reciprocal(np.sqrt(phase_variances))
+        
+        
+        
+        """
+            3. Assemble coarse grid ------------------------------------------
+        """
+        
+        
+        # i) Grid including the bounds, spacing at most lambda_min/(2*oversampling)
+        
+        step=np.min(self.wavelengths)/(2*oversampling)
+        n_grid=int(np.ceil((d_upper-d_lower)/step))+1
+        self.d_grid=np.linspace(d_lower,d_upper,max(n_grid,2))
+        self.h=self.d_grid[1]-self.d_grid[0]
+        
+        
+        # ii) Decrease of term i over half a cell
+        
+        self.slack=0.5*4*np.pi*self.phase_weights*self.lambda_vec_pinv*self.h
+        
+        
+    def solve_certified(self, observations):
+        
+        # Solution and the gap certified by the lower bounds of the cells
+        
+        d,N,r=self.solve(observations)
+        
+        return d, N, r, self.gap
+    
+    
+    def _solve_info(self):
+        
+        # Global optimality is certified only if the gap vanishes
+        
+        return {'status' : 'optimal' if self.gap==0 else 'optimal_inaccurate', 'gap' : self.gap}
+    
+    
+    def _terms(self, d, phi_frac):
+        
+        # Weighted absolute residuals [n_d,n_obs] and wavecycles for N by rounding
+        
+        import numpy as np
+        
+        cycles=2*d[:,np.newaxis]*self.lambda_vec_pinv[np.newaxis,:]-phi_frac[np.newaxis,:]
+        N=np.clip(np.round(cycles),self.N_lower,self.N_upper)
+        
+        return 2*np.pi*np.abs(cycles-N)*self.phase_weights, N
+    
+    
+    def _solve_phases(self, phi_obs):
+        
+        """
+            4. Sweep coarse grid and refine top-k cells ----------------------
+        """
+        
+        
+        import numpy as np
+        
+        phi_frac=phi_obs/(2*np.pi)
+        n_grid=len(self.d_grid)
+        
+        # Coarse sweep in chunks overlapping by one point, lower bounds per cell
+        
+        obj_grid=np.zeros([n_grid])
+        lower_bound=np.zeros([n_grid-1])
+        
+        for k in range(0,n_grid-1,self.chunk_size):
+            terms,_=self._terms(self.d_grid[k:k+self.chunk_size+1],phi_frac)
+            obj_grid[k:k+len(terms)]=np.sum(terms,axis=1)
+            lower_bound[k:k+len(terms)-1]=np.sum(np.maximum(0.5*(terms[:-1,:]+terms[1:,:])-self.slack,0),axis=1)
+        
+        k_best=np.argmin(obj_grid)
+        obj_best=obj_grid[k_best]
+        d_best=self.d_grid[k_best]
+        
+        # Refine the top-k unrefined cells until none can contain a better point
+        
+        order=np.argsort(lower_bound)
+        n_refined=0
+        
+        for _ in range(self.max_rounds):
+            if n_refined>=len(order) or lower_bound[order[n_refined]]>=obj_best-self.tolerance:
+                break
+            
+            cells=order[n_refined:n_refined+self.top_k]
+            cells=cells[lower_bound[cells]<obj_best-self.tolerance]
+            n_refined+=len(cells)
+            
+            # Zero of residual i following the left end point of each cell
+            
+            a=self.d_grid[cells]
+            N_next=np.ceil(2*a[:,np.newaxis]*self.lambda_vec_pinv-phi_frac)
+            d_zero=0.5*self.wavelengths*(N_next+phi_frac)
+            d_zero=d_zero[d_zero<=self.d_grid[cells+1][:,np.newaxis]]
+            
+            if len(d_zero)>0:
+                terms,_=self._terms(d_zero,phi_frac)
+                obj_zero=np.sum(terms,axis=1)
+                k_min=np.argmin(obj_zero)
+                if obj_zero[k_min]<obj_best:
+                    obj_best=obj_zero[k_min]
+                    d_best=d_zero[k_min]
+        
+        # Certificate gap from the remaining cells
+        
+        remaining=lower_bound[order[n_refined:]]
+        self.gap=float(max(obj_best-np.min(remaining),0)) if len(remaining)>0 else 0.0
+        
+        _,N=self._terms(np.array([d_best]),phi_frac)
+        
+        return d_best, N[0,:]
+    
+    
+    
+    
+    
+    
+    
+def Optimal_distance(N, phi_obs, wavelengths, phase_weights, d_lower=0, d_upper=float('inf')):
+    """
+    The goal of this function is to compute the distance d minimizing the 
+    weighted l1 norm of the phase residuals 2*pi*(2*d/lambda_i - N_i) - phi_i
+    for fixed wavecycles N. Each residual vanishes at d_i = lambda_i*(N_i + 
+    phi_i/2pi)/2 and grows with slope 4*pi*w_i/lambda_i so that the optimum is
+    the weighted median of the d_i, clipped to the bounds of d. For a matrix
+    N of several candidate wavecycle vectors, the optimal distances of all
+    candidates are computed at once.
+    
+    Name                 Interpretation                             Type
+    N                   Full wavecycles                             vector [n_obs] or
+                                                                    matrix [n_cand,n_obs]
+    phi_obs             Observed phases                             vector [n_obs]
+    wavelengths         Wavelengths of the measurements             vector [n_obs]
+    phase_weights       Inverse phase standard deviations           vector [n_obs]
+    d_lower, d_upper    Bounds on the distance                      real numbers
+    d                   The optimal distance                        real number or
+                                                                    vector [n_cand]
+    
+    """
+    
+    import numpy as np
+    
+    N=np.asarray(N,dtype=float)
+    wavelengths=np.asarray(wavelengths,dtype=float)
+    d_zero=0.5*wavelengths*(N+phi_obs/(2*np.pi))
+    slopes=np.broadcast_to(4*np.pi*phase_weights/wavelengths,d_zero.shape)
+    
+    order=np.argsort(d_zero,axis=-1)
+    slopes_cum=np.cumsum(np.take_along_axis(slopes,order,axis=-1),axis=-1)
+    k_median=np.argmax(slopes_cum>=0.5*slopes_cum[...,-1:],axis=-1)
+    d=np.take_along_axis(np.take_along_axis(d_zero,order,axis=-1),k_median[...,np.newaxis],axis=-1)[...,0]
+    d=np.clip(d,d_lower,d_upper)
+    
+    return float(d) if N.ndim==1 else d
+    
+    
+    
+    
+    
+    
+    
+class Solution_cache:
+    """ 
+    The goal of this class is to memoize solutions of the ambiguity resolution
+    problem for static scenes in which identical or nearly identical phase 
+    vectors are observed repeatedly. Solutions are stored under a key composed
+    of a hash of the configuration, i.e. the wavelengths, phase variances and
+    optimization options, and of the observed phases wrapped to [0, 2*pi) and
+    quantized with the given tolerance. Observations whose quantized phases
+    coincide with those of an earlier solve are answered from the cache 
+    without calling any solver. Only d and N are stored; the residuals are
+    recomputed from the phases of the current observations. When the 
+    estimated memory of all entries exceeds max_bytes, the least recently 
+    used entries are evicted.
+    
+    INPUTS
+    The inputs consist in the quantization tolerance and the memory cap. The 
+    cache is used by passing it as entry "cache" of optim_opts to the functions
+    Ambiguity_resolution and Ambiguity_resolution_batch.
+    
+    Name                 Interpretation                             Type
+    tolerance           Width of the quantization bins of the       positive number
+                        phases in radians
+    max_bytes           Maximum estimated memory of all entries     positive integer
+    
+    
+    OUTPUTS
+    The attributes hits, misses and evictions count lookups answered from the
+    cache, lookups that required a solve and evicted entries; n_bytes is the
+    estimated memory of all entries.
+                          
+    """
+    
+    def __init__(self, tolerance=1e-6, max_bytes=2**26):
+        
+        from collections import OrderedDict
+        
+        self.tolerance=tolerance
+        self.max_bytes=max_bytes
+        self.entries=OrderedDict()
+        self.n_bytes=0
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+    
+    
+    def config_key(self, wavelengths, phase_variances, optim_opts):
+        
+        # Hash of the configuration, see Config_key
+        
+        return Config_key(wavelengths, phase_variances, optim_opts)
+    
+    
+    def lookup(self, config_key, phi_obs):
+        
+        # Cached solution or None, hits move to the end of the LRU order
+        
+        key=self._key(config_key, phi_obs)
+        value=self.entries.get(key)
+        
+        if value is None:
+            self.misses+=1
+            return None
+        
+        self.hits+=1
+        self.entries.move_to_end(key)
+        
+        return value[0], value[1].copy()
+    
+    
+    def store(self, config_key, phi_obs, d, N):
+        
+        # Insert or refresh an entry and evict least recently used entries
+        
+        import numpy as np
+        
+        key=self._key(config_key, phi_obs)
+        value=(d, np.array(N))
+        
+        if key in self.entries:
+            self.n_bytes-=self._n_bytes(key, self.entries.pop(key))
+        self.entries[key]=value
+        self.n_bytes+=self._n_bytes(key, value)
+        
+        while self.n_bytes>self.max_bytes and len(self.entries)>0:
+            key_old,value_old=self.entries.popitem(last=False)
+            self.n_bytes-=self._n_bytes(key_old, value_old)
+            self.evictions+=1
+    
+    
+    def clear(self):
+        
+        self.entries.clear()
+        self.n_bytes=0
+    
+    
+    def resolve(self, observations, wavelengths, phase_variances, optim_opts, return_stats=False):
+        
+        # Answer Ambiguity_resolution from the cache or solve and store
+        
+        import numpy as np
+        import time
+        
+        t_start=time.perf_counter()
+        config_key=self.config_key(wavelengths, phase_variances, optim_opts)
+        phi_obs=np.angle(observations)
+        _Check_phases(phi_obs)
+        value=self.lookup(config_key, phi_obs)
+        
+        if value is not None:
+            d,N=value
+            r=2*np.pi*(2*d*Pseudo_reciprocal(wavelengths)-N)-phi_obs
+            stats={'status' : 'cached', 'time_total' : time.perf_counter()-t_start}
+            return (d, N, r, stats) if return_stats else (d, N, r)
+        
+        result=Ambiguity_resolution(observations, wavelengths, phase_variances, dict(optim_opts, cache=None), return_stats)
+        self.store(config_key, phi_obs, result[0], result[1])
+        
+        return result
+    
+    
+    def _cached_solve(self, resolver, config_key):
+        
+        # Wrap the method _solve_recorded of a resolver
+        
+        def solve_phases_cached(phi_obs):
+            value=self.lookup(config_key, phi_obs)
+            if value is not None:
+                return value
+            d,N=resolver._solve_recorded(phi_obs)
+            self.store(config_key, phi_obs, d, N)
+            return d, N
+        
+        return solve_phases_cached
+    
+    
+    def _key(self, config_key, phi_obs):
+        
+        # Phases wrapped to [0, 2*pi) and quantized, the last bin wraps to 0
+        
+        import numpy as np
+        
+        n_levels=int(np.ceil(2*np.pi/self.tolerance))
+        levels=np.round(np.mod(phi_obs,2*np.pi)/self.tolerance).astype(np.int64)%n_levels
+        
+        return config_key+levels.tobytes()
+    
+    
+    def _n_bytes(self, key, value):
+        
+        # Estimated memory of an entry including the overhead of Python objects
+        
+        return len(key)+value[1].nbytes+256
+    
+    
+    
+    
+    
+    
+    
+def Residuals_batch(d, N, phi_obs, lambda_vec_pinv, dtype='float64', out=None):
+    """
+    The goal of this function is to compute the unweighted residuals 
+    r = 2*pi*(2*d/lambda - N) - phi_obs of a batch of pixels in the data type
+    dtype. With dtype 'float32' all [n_pixels,n_obs] arrays are single 
+    precision and updated in place, halving the memory traffic. The absolute
+    error of the residuals then grows like 4*pi*d/lambda_min*2^-23, i.e. with
+    the number of wavecycles, see Benchmark_single_precision.py. If a buffer 
+    out is given, the residuals are written into it and nothing is allocated.
+    
+    Name                 Interpretation                             Type
+    d                   The estimated distances                     vector [n_pixels]
+    N                   The estimated full wavecycles               matrix [n_pixels,n_obs]
+    phi_obs             The observed phases                         matrix [n_pixels,n_obs]
+    lambda_vec_pinv     Reciprocals of the wavelengths              vector [n_obs]
+    dtype               Data type of the computation                'float64' or 'float32'
+    out                 Optional preallocated buffer of type dtype  matrix [n_pixels,n_obs]
+    r                   The unweighted residuals                    matrix [n_pixels,n_obs]
+    
+    """
+    
+    import numpy as np
+    
+    d=np.asarray(d)
+    if out is None:
+        out=np.empty([len(d),len(lambda_vec_pinv)],dtype=dtype)
+    
+    np.multiply(d[:,np.newaxis],lambda_vec_pinv,out=out)
+    out*=2
+    out-=N
+    out*=out.dtype.type(2*np.pi)
+    out-=phi_obs
+    
+    return out
+    
+    
+    
+    
+    
+    
+    
+def Pseudo_reciprocal(values, rcond=1e-15):
+    """
+    The goal of this function is to compute the diagonal of the pseudoinverse
+    of the diagonal matrix np.diag(values) elementwise, i.e. without forming 
+    the dense [n,n] matrix and its singular value decomposition. As for 
+    np.linalg.pinv, entries whose magnitude does not exceed rcond times the 
+    largest magnitude are mapped to 0 instead of being inverted.
+    
+    Name                 Interpretation                             Type
+    values              Diagonal entries, e.g. the wavelengths or   vector [n]
+                        the phase standard deviations
+    rcond               Relative cutoff for small entries           real number
+    reciprocal          Reciprocals of the entries, 0 where cut     vector [n]
+    
+    """
+    
+    import numpy as np
+    
+    values=np.asarray(values,dtype=float)
+    is_inverted=np.abs(values)>rcond*np.max(np.abs(values),initial=0)
+    
+    return np.where(is_inverted,1/np.where(is_inverted,values,1),0)
+    
+    
+    
+    
+    
+    
+    
+def _Check_phases(phi_obs):
+    
+    # Raise a ValueError naming the pixels with non-finite observed phases,
+    # the resolvers would otherwise fail with obscure errors or return garbage
+    
+    import numpy as np
+    
+    phi_obs=np.asarray(phi_obs)
+    is_finite=np.isfinite(phi_obs).reshape([-1,phi_obs.shape[-1]]).all(axis=1)
+    
+    if not is_finite.all():
+        if phi_obs.ndim==1:
+            raise ValueError('The observed phases {} are not finite'.format(phi_obs))
+        raise ValueError('The observed phases of pixels {} are not finite'.format(np.flatnonzero(~is_finite).tolist()))
+    
+    
+    
+    
+    
+    
+    
+def Config_key(wavelengths, phase_variances, optim_opts):
+    """
+    The goal of this function is to compute a hash of a configuration of the
+    ambiguity resolution problem, i.e. the wavelengths, phase variances and 
+    optimization options, that identifies resolvers and cached solutions. The
+    entries "cache", "callback" and "verbose" of optim_opts do not change the
+    solutions and are excluded. Arrays enter by their bytes, containers 
+    recursively and all other values by their repr.
+    
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    config_key          The sha1 digest of the configuration        bytes
+    
+    """
+    
+    import hashlib
+    import numpy as np
+    
+    config=hashlib.sha1(np.asarray(wavelengths,dtype=float).tobytes())
+    config.update(np.asarray(phase_variances,dtype=float).tobytes())
+    
+    for key in sorted(optim_opts.keys()):
+        if key not in ['cache', 'callback', 'verbose']:
+            config.update(key.encode())
+            _Update_hash(config, optim_opts[key])
+    
+    return config.digest()
+
+
+def _Update_hash(config, value):
+    
+    # Arrays by their bytes, containers recursively, all else by repr
+    
+    import numpy as np
+    
+    if isinstance(value,np.ndarray):
+        config.update(value.dtype.str.encode()+repr(value.shape).encode()+value.tobytes())
+    elif isinstance(value,dict):
+        for key in sorted(value.keys()):
+            config.update(repr(key).encode())
+            _Update_hash(config, value[key])
+    elif isinstance(value,(list,tuple)):
+        config.update(b'[')
+        for item in value:
+            _Update_hash(config, item)
+        config.update(b']')
+    else:
+        config.update(repr(value).encode())
+
+
+
+import threading
+
+_resolver_memo=threading.local()
+_resolver_memo_size=8
+
+_lookup_index_memo={}
+_lookup_index_lock=threading.Lock()
+
+
+def _Memoized_resolver(wavelengths, phase_variances, optim_opts):
+    
+    # Resolvers of the most recently used configurations are kept per thread
+    # so that repeated calls neither rebuild programs nor lose the state of
+    # stateful backends such as the hint of Streaming_resolver. Resolvers are
+    # not thread-safe and are never shared between threads; the callback and
+    # verbosity of the current call replace those of earlier calls of the
+    # same thread.
+    
+    memo=getattr(_resolver_memo,'resolvers',None)
+    if memo is None:
+        memo=_resolver_memo.resolvers={}
+    
+    key=Config_key(wavelengths, phase_variances, optim_opts)
+    resolver=memo.pop(key,None)
+    if resolver is None:
+        resolver=Setup_resolver(wavelengths, phase_variances, optim_opts)
+    
+    memo[key]=resolver
+    while len(memo)>_resolver_memo_size:
+        del memo[next(iter(memo))]
+    
+    resolver.callback=optim_opts.get('callback')
+    for target in (resolver, getattr(resolver,'fallback',None)):
+        if hasattr(target,'verbose'):
+            target.verbose=optim_opts.get('verbose',False)
+    
+    return resolver
+    
+    
+    
+    
+    
+    
+    
+def Setup_resolver(wavelengths, phase_variances, optim_opts):
+    """
+    The goal of this function is to set up a resolver object for the method of
+    solution selected by the entry "backend" of the dictionary optim_opts. All
+    resolvers are built once per configuration of wavelengths, phase variances
+    and optimization options and provide a method solve(observations) that
+    returns the triple (d, N, r).
+    
+    Name                 Interpretation                             Class
+    'milp'              Mixed integer linear program solved by      Ambiguity_resolver
+                        a cvxpy solver (default), see 
+                        Solver_arguments
+    'enumeration'       Exact enumeration of phase wrap points      Enumeration_resolver
+    'fast_path'         Closed form beat wavelength unwrapping      Fast_path_resolver
+                        with fallback to another backend
+    'stream'            Mixed integer linear program restricted     Streaming_resolver
+                        to a window around the previous solution
+    'scipy_milp'        Mixed integer linear program assembled      Sparse_MILP_resolver
+                        in sparse form and solved by 
+                        scipy.optimize.milp without cvxpy
+    'lookup'            Precomputed KD-tree of phase vectors        Lookup_index_AR.
+                        with local refinement                       Lookup_resolver
+    'coarse_to_fine'    Grid search with Lipschitz bounds and       Coarse_to_fine_resolver
+                        exact refinement of the top-k cells
+    
+    """
+    
+    backend=optim_opts.get('backend','milp')
+    
+    if backend not in _resolver_classes:
+        raise ValueError('Unknown backend {}, choose one of {}'.format(backend,list(_resolver_classes.keys())))
+    
+    return _resolver_classes[backend](wavelengths, phase_variances, optim_opts)
+
+
+
+_resolver_classes={'milp' : Ambiguity_resolver,
+                   'enumeration' : Enumeration_resolver,
+                   'fast_path' : Fast_path_resolver,
+                   'stream' : Streaming_resolver,
+                   'scipy_milp' : Sparse_MILP_resolver,
+                   'coarse_to_fine' : Coarse_to_fine_resolver,
+                   'lookup' : lambda *args: _Lookup_resolver(*args)}
+
+
+
+def _Lookup_resolver(wavelengths, phase_variances, optim_opts):
+    
+    # Resolver from Lookup_index_AR, imported only when used. Indices built
+    # for the bounds of optim_opts are read-only and shared by all threads.
+    
+    import numpy as np
+    import Lookup_index_AR
+    
+    if optim_opts.get('lookup_index') is None:
+        d_lower,d_upper,_,_,_=Compile_bounds(optim_opts, len(wavelengths), strict=True)
+        if np.isfinite(d_upper):
+            key=Config_key(wavelengths, [], {'d_lower' : d_lower, 'd_upper' : d_upper})
+            with _lookup_index_lock:
+                index=_lookup_index_memo.pop(key,None)
+                if index is None:
+                    index=Lookup_index_AR.Build_lookup_index(wavelengths, d_lower, d_upper)
+                _lookup_index_memo[key]=index
+                while len(_lookup_index_memo)>_resolver_memo_size:
+                    del _lookup_index_memo[next(iter(_lookup_index_memo))]
+            optim_opts=dict(optim_opts, lookup_index=index)
+    
+    return Lookup_index_AR.Lookup_resolver(wavelengths, phase_variances, optim_opts)
+
+
+
+
+
+
+def Compile_bounds(optim_opts, n_obs, strict=False):
+    """
+    The goal of this function is to compile the constraints in optim_opts into
+    numerical bounds on the distance and the wavecycles once per configuration.
+    Structured bounds are read from the entry "bounds" of optim_opts, see
+    Setup_optim_options. Constraint strings of the forms 'd_opt>=a', 'd_opt<=b',
+    'N_opt[k]>=a' and 'N_opt[k]<=b' in the entry "constraints", where a and b
+    may be inf, are converted to bounds as well and all bounds are intersected. Other constraint strings are
+    returned for evaluation by the mixed integer linear programs; if "strict" is
+    True they raise a ValueError instead. As the variable d_opt is nonnegative,
+    its lower bound is at least 0.
+    
+    Name                 Interpretation                             Type
+    d_lower             Lower bound on the distance                 real number
+    d_upper             Upper bound on the distance                 real number
+    N_lower             Lower bounds on the wavecycles              vector [n_obs]
+    N_upper             Upper bounds on the wavecycles              vector [n_obs]
+    cons_extra          Constraints that are not simple bounds      list of strings
+    
+    """
+    
+    import numpy as np
+    import re
+    
+    
+    # Structured bounds
+    
+    bounds=optim_opts.get('bounds',{})
+    d_lower=max(0.0,bounds.get('d_lower',0.0))
+    d_upper=bounds.get('d_upper',np.inf)
+    N_lower=np.broadcast_to(np.asarray(bounds.get('N_lower',-np.inf),dtype=float),[n_obs]).copy()
+    N_upper=np.broadcast_to(np.asarray(bounds.get('N_upper',np.inf),dtype=float),[n_obs]).copy()
+    
+    
+    # Simple bounds in string form
+    
+    pattern=re.compile(r'^\s*(d_opt|N_opt\[(\d+)\])\s*(<=|>=)\s*([-+]?inf|[-+0-9.eE]+)\s*$')
+    cons_extra=[]
+    
+    for cstr in optim_opts.get('constraints',[]):
+        match=pattern.match(cstr)
+        if match is None:
+            if strict:
+                raise ValueError('Constraint {} is not a simple bound'.format(cstr))
+            cons_extra.append(cstr)
+            continue
+        
+        variable,index,relation,value=match.groups()
+        value=float(value)
+        if index is None:
+            if relation=='>=':
+                d_lower=max(d_lower,value)
+            else:
+                d_upper=min(d_upper,value)
+        else:
+            if relation=='>=':
+                N_lower[int(index)]=max(N_lower[int(index)],value)
+            else:
+                N_upper[int(index)]=min(N_upper[int(index)],value)
+    
+    return d_lower, d_upper, N_lower, N_upper, cons_extra
+
+
+
+def _Bound_constraints(d_opt, N_opt, d_lower, d_upper, N_lower, N_upper):
+    
+    # Vectorized cvxpy constraints for the finite bounds
+    
+    import numpy as np
+    
+    cons=[]
+    if d_lower>0:
+        cons.append(d_opt>=d_lower)
+    if np.isfinite(d_upper):
+        cons.append(d_opt<=d_upper)
+    
+    for N_bound,is_lower in [(N_lower,True),(N_upper,False)]:
+        index=np.flatnonzero(np.isfinite(N_bound))
+        if len(index)==len(N_bound):
+            cons.append(N_opt>=N_bound if is_lower else N_opt<=N_bound)
+        elif len(index)>0:
+            cons.append(N_opt[index]>=N_bound[index] if is_lower else N_opt[index]<=N_bound[index])
+    
+    return cons
+
+
+
+def Solver_arguments(optim_opts):
+    """
+    The goal of this function is to select the mixed integer solver used by 
+    cvxpy and to translate solver independent options into the keyword 
+    arguments understood by this solver. The solver is given by the entry
+    "solver" of optim_opts; if it is missing or None, the fastest installed
+    solver is chosen in the order CBC, GLPK_MI, SCIP, HIGHS as measured by
+    Benchmark_solvers.py on the configurations of the examples. The entry 
+    "solver_options" is a dictionary whose keys 'time_limit' (seconds), 
+    'mip_gap' (relative) and 'threads' are translated; all other keys are 
+    passed on to the solver unchanged. The entry "max_iter" only limits the
+    iterations of GLPK_MI; the other solvers have no equivalent limit for 
+    mixed integer programs in cvxpy. The list of installed solvers is 
+    determined once per process.
+    
+    Name                 Interpretation                             Type
+    optim_opts          The options for optimization                dictionary
+    solver              Name of the cvxpy solver                    string
+    solver_args         Keyword arguments for Problem.solve         dictionary
+    
+    """
+    
+    global _installed_solvers
+    
+    if _installed_solvers is None:
+        import cvxpy as cp
+        _installed_solvers=cp.installed_solvers()
+    
+    installed=_installed_solvers
+    solver=optim_opts.get('solver')
+    
+    if solver is None:
+        available=[name for name in _milp_solver_priority if name in installed]
+        if len(available)==0:
+            raise ValueError('None of the mixed integer solvers {} is installed'.format(_milp_solver_priority))
+        solver=available[0]
+    elif solver not in _milp_solvers or solver not in installed:
+        raise ValueError('Solver {} is not supported or not installed, choose one of {}'.format(
+                         solver,[name for name in _milp_solver_priority if name in installed]))
+    
+    options=dict(optim_opts.get('solver_options') or {})
+    solver_args=_milp_solvers[solver](options, optim_opts.get('max_iter'))
+    
+    return solver, solver_args
+
+
+
+def _Options_highs(options, max_iter):
+    
+    # HiGHS reads its native option names
+    
+    translation={'time_limit' : 'time_limit', 'mip_gap' : 'mip_rel_gap', 'threads' : 'threads'}
+    
+    return {translation.get(key,key) : value for key,value in options.items()}
+
+
+def _Options_scip(options, max_iter):
+    
+    # SCIP reads its parameters from the dictionary scip_params
+    
+    translation={'time_limit' : 'limits/time', 'mip_gap' : 'limits/gap', 'threads' : 'parallel/maxnthreads'}
+    scip_params={translation[key] : options.pop(key) for key in list(options.keys()) if key in translation}
+    scip_params.update(options.pop('scip_params',{}))
+    
+    return dict(options, scip_params=scip_params)
+
+
+def _Options_cbc(options, max_iter):
+    
+    # CBC reads its native option names
+    
+    translation={'time_limit' : 'maximumSeconds', 'mip_gap' : 'allowableFractionGap', 'threads' : 'numberThreads'}
+    
+    return {translation.get(key,key) : value for key,value in options.items()}
+
+
+def _Options_glpk(options, max_iter):
+    
+    # GLPK_MI is single threaded and reads its time limit in milliseconds
+    
+    solver_args={'max_iters' : max_iter} if max_iter is not None else {}
+    options.pop('threads',None)
+    if 'time_limit' in options:
+        solver_args['tm_lim']=int(1000*options.pop('time_limit'))
+    if 'mip_gap' in options:
+        solver_args['mip_gap']=options.pop('mip_gap')
+    solver_args.update(options)
+    
+    return solver_args
+
+
+
+_milp_solvers={'HIGHS' : _Options_highs,
+               'SCIP' : _Options_scip,
+               'CBC' : _Options_cbc,
+               'GLPK_MI' : _Options_glpk}
+
+_milp_solver_priority=['CBC', 'GLPK_MI', 'SCIP', 'HIGHS']
+
+_installed_solvers=None
+
+
+
+# Solver state of a worker process in Ambiguity_resolution_parallel
+
+_worker_state={}
+
+
+def Solver_statistics(problem, time_solve_call):
+    """
+    The goal of this function is to collect the statistics of one call to the
+    solve() method of a cvxpy problem in a solver independent form. Entries 
+    that the solver does not report are None; if the solver does not report
+    its time, the time of the call minus the time of canonicalization is used.
+    Ambiguity_resolution adds the entries 'time_assembly', 'time_constraints',
+    'time_extraction' and 'time_total', the resolvers the entries 'n_solver_calls',
+    'time_extraction' and 'time_total'; all times are in seconds.
+    
+    Name                 Interpretation                             Type
+    problem             A cvxpy problem that has just been solved   cvxpy.Problem
+    time_solve_call     Wall time of the call to solve()            real number
+    stats               Entries 'status', 'time_solve_call',        dictionary
+                        'time_canonicalization', 'time_solver',
+                        'n_iterations', 'n_nodes'
+    
+    """
+    
+    solver_stats=problem.solver_stats
+    extra_stats=getattr(solver_stats,'extra_stats',None)
+    time_canonicalization=getattr(problem,'compilation_time',None)
+    
+    
+    # Solver time, iteration and node counts as far as reported
+    
+    time_solver=getattr(solver_stats,'solve_time',None)
+    if time_solver is None:
+        time_solver=time_solve_call-(time_canonicalization or 0)
+    
+    n_iterations=getattr(solver_stats,'num_iters',None)
+    if n_iterations is not None and n_iterations<0:
+        n_iterations=getattr(extra_stats,'simplex_iteration_count',None)
+    
+    n_nodes=None
+    if hasattr(extra_stats,'mip_node_count'):
+        n_nodes=extra_stats.mip_node_count
+    elif isinstance(extra_stats,dict) and hasattr(extra_stats.get('model'),'getNNodes'):
+        n_nodes=extra_stats['model'].getNNodes()
+    
+    return {'status' : problem.status,
+            'time_solve_call' : time_solve_call,
+            'time_canonicalization' : time_canonicalization,
+            'time_solver' : time_solver,
+            'n_iterations' : n_iterations,
+            'n_nodes' : n_nodes}
+
+
+
+def Aggregate_stats(records, n_bins=20):
+    """
+    The goal of this function is to aggregate the statistics of many solves,
+    e.g. of all pixels of a batch, into histograms and summary values. Every
+    numerical entry is summarized separately over the solves that report it;
+    the statuses are counted.
+    
+    Name                 Interpretation                             Type
+    records             Statistics of single solves                 list of dict
+    n_bins              Number of bins of the histograms            positive integer
+    stats               Entries 'n_solves', 'status' (counts per    dictionary
+                        status), 'records' and per numerical entry
+                        a dictionary with 'counts', 'edges', 
+                        'mean', 'p50', 'p95', 'p99' and 'total'
+    
+    """
+    
+    import numpy as np
+    from collections import Counter
+    
+    stats={'n_solves' : len(records),
+           'status' : dict(Counter(record.get('status') for record in records)),
+           'records' : records}
+    
+    keys=sorted({key for record in records for key in record if key!='status'})
+    for key in keys:
+        values=np.array([record[key] for record in records if record.get(key) is not None],dtype=float)
+        if len(values)==0:
+            continue
+        counts,edges=np.histogram(values,bins=n_bins)
+        p50,p95,p99=np.percentile(values,[50,95,99])
+        stats[key]={'counts' : counts, 'edges' : edges, 'mean' : float(np.mean(values)),
+                    'p50' : float(p50), 'p95' : float(p95), 'p99' : float(p99),
+                    'total' : float(np.sum(values))}
+    
+    return stats
+
+
+
+def _Init_parallel_worker(wavelengths, phase_variances, optim_opts):
+    
+    # Build the resolver once per worker process
+    
+    _worker_state['config']=(wavelengths, phase_variances, optim_opts)
+    _worker_state['resolver']=Setup_resolver(wavelengths, phase_variances, optim_opts)
+
+
+def _Resolve_parallel_chunk(observations, return_stats=False):
+    
+    # Resolve one chunk with the resolver of this worker process
+    
+    wavelengths, phase_variances, optim_opts=_worker_state['config']
+    
+    return Ambiguity_resolution_batch(observations, wavelengths, phase_variances, optim_opts,
+                                      resolver=_worker_state['resolver'], return_stats=return_stats)
+    
+    
+    
+    
+    
+    
+    
     
     
     
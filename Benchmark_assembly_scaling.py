@@ -0,0 +1,97 @@
+"""
+The goal of this script is to compare the assembly of the mixed integer linear
+program with dense pseudoinverses of diagonal matrices to the elementwise
+weighting used by Ambiguity_resolution for numbers of observations between 10
+and 1000. Both the computation of the weights and the formulation plus
+canonicalization of the cvxpy problem are timed; the problems are not solved.
+For this, do the following:
+    1. Definitions and imports
+    2. Time both assemblies
+    3. Compare results
+
+"""
+
+"""
+    1. Definitions and imports -----------------------------------------------
+"""
+
+
+
+# i) Imports
+
+
+import numpy as np
+import cvxpy as cp
+import Ambiguity_resolution as AR
+import time
+
+
+# ii) Basic definitions
+
+n_obs_list=[10, 30, 100, 300, 1000]
+n_repetitions=5
+solver,_=AR.Solver_arguments({})
+
+
+# iii) Formulation of the problem for given weights
+
+def Formulate_problem(lambda_vec_pinv, weighting, n_obs):
+    d_opt=cp.Variable(nonneg=True)
+    N_opt=cp.Variable(n_obs,integer=True)
+    phi_obs=cp.Parameter(n_obs)
+    residuals=2*np.pi*(2*d_opt*lambda_vec_pinv-N_opt)-phi_obs
+    problem=cp.Problem(cp.Minimize(cp.norm(weighting(residuals),p=1)),[d_opt<=20, N_opt>=0])
+    phi_obs.value=np.zeros([n_obs])
+    problem.get_problem_data(solver)
+    return problem
+
+
+
+"""
+    2. Time both assemblies --------------------------------------------------
+"""
+
+
+# i) Dense pseudoinverses as in earlier versions and elementwise weights
+
+t_weights_dense=np.zeros([len(n_obs_list)])
+t_weights_vector=np.zeros([len(n_obs_list)])
+t_problem_dense=np.zeros([len(n_obs_list)])
+t_problem_vector=np.zeros([len(n_obs_list)])
+
+for k,n_obs in enumerate(n_obs_list):
+    wavelengths=np.linspace(0.01,0.05,n_obs)
+    phase_variances=np.ones([n_obs])*0.01
+
+    for _ in range(n_repetitions):
+        t_start=time.perf_counter()
+        lambda_vec_pinv=np.diag(np.linalg.pinv(np.diag(wavelengths)))
+        phase_std_pinv=np.linalg.pinv(np.diag(np.sqrt(phase_variances)))
+        t_weights_dense[k]+=(time.perf_counter()-t_start)/n_repetitions
+
+        t_start=time.perf_counter()
+        Formulate_problem(lambda_vec_pinv, lambda residuals: phase_std_pinv@residuals, n_obs)
+        t_problem_dense[k]+=(time.perf_counter()-t_start)/n_repetitions
+
+        t_start=time.perf_counter()
+        lambda_vec_pinv=AR.Pseudo_reciprocal(wavelengths)
+        phase_weights=AR.Pseudo_reciprocal(np.sqrt(phase_variances))
+        t_weights_vector[k]+=(time.perf_counter()-t_start)/n_repetitions
+
+        t_start=time.perf_counter()
+        Formulate_problem(lambda_vec_pinv, lambda residuals: cp.multiply(phase_weights,residuals), n_obs)
+        t_problem_vector[k]+=(time.perf_counter()-t_start)/n_repetitions
+
+
+
+"""
+    3. Compare results -------------------------------------------------------
+"""
+
+
+# i) Print out timings
+
+print(' n_obs | weights dense | weights elementwise | problem dense | problem elementwise')
+for k,n_obs in enumerate(n_obs_list):
+    print(' {:5d} | {:10.3f} ms | {:16.3f} ms | {:10.1f} ms | {:16.1f} ms'.format(n_obs, 1000*t_weights_dense[k],
+          1000*t_weights_vector[k], 1000*t_problem_dense[k], 1000*t_problem_vector[k]))
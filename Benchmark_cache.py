@@ -0,0 +1,109 @@
+"""
+The goal of this script is to measure the hit rate and the speedup achieved by
+the Solution_cache of Ambiguity_resolution on data of a static scene that is
+revisited frame by frame. Every frame contains the same pixels, their phases
+differ only by a tiny jitter well below the quantization tolerance of the
+cache. A second run over two frames with a memory cap for half of the pixels
+illustrates LRU eviction: As the pixels are revisited cyclically, every entry
+is evicted before it is needed again.
+For this, do the following:
+    1. Definitions and imports
+    2. Simulate repeated scene
+    3. Resolve without and with cache
+    4. Compare results
+
+"""
+
+"""
+    1. Definitions and imports -----------------------------------------------
+"""
+
+
+
+# i) Imports
+
+
+import numpy as np
+import Ambiguity_resolution as AR
+import Support_funs_AR as sf
+import time
+
+
+# ii) Basic definitions
+
+n_obs=10
+n_pixels=20
+n_frames=5
+seed=0
+
+wavelengths=np.linspace(0.01,0.05,n_obs)
+phase_variances=np.ones([n_obs])*0.01
+optim_opts=sf.Setup_optim_options(n_obs, d_upper=20)
+
+tolerance=1e-4
+jitter=1e-7
+
+rng=sf.Setup_rng(seed)
+
+
+
+"""
+    2. Simulate repeated scene -----------------------------------------------
+"""
+
+
+# i) Static scene observed with noise once, revisited with tiny jitter
+
+d_true=rng.uniform(0,10,[n_pixels,1])
+scene=sf.Generate_data_noisy_batch(np.ones([1]),d_true,wavelengths,phase_variances,rng=rng)
+frames=[scene*np.exp(1j*rng.normal(0,jitter,scene.shape)) for _ in range(n_frames)]
+
+
+
+"""
+    3. Resolve without and with cache ----------------------------------------
+"""
+
+
+# i) Without cache
+
+resolver=AR.Setup_resolver(wavelengths, phase_variances, optim_opts)
+
+t_start=time.perf_counter()
+d_plain=[AR.Ambiguity_resolution_batch(frame, wavelengths, phase_variances, optim_opts, resolver=resolver)[0] for frame in frames]
+t_plain=time.perf_counter()-t_start
+
+
+# ii) With cache holding all pixels
+
+cache=AR.Solution_cache(tolerance=tolerance)
+optim_opts_cache=dict(optim_opts, cache=cache)
+
+t_start=time.perf_counter()
+d_cache=[AR.Ambiguity_resolution_batch(frame, wavelengths, phase_variances, optim_opts_cache, resolver=resolver)[0] for frame in frames]
+t_cache=time.perf_counter()-t_start
+
+
+# iii) With a memory cap for half of the pixels
+
+cache_small=AR.Solution_cache(tolerance=tolerance, max_bytes=n_pixels//2*cache._n_bytes(b'0'*(20+8*n_obs),(0,np.zeros([n_obs]),np.zeros([n_obs]))))
+optim_opts_small=dict(optim_opts, cache=cache_small)
+
+for frame in frames[:2]:
+    AR.Ambiguity_resolution_batch(frame, wavelengths, phase_variances, optim_opts_small, resolver=resolver)
+
+
+
+"""
+    4. Compare results -------------------------------------------------------
+"""
+
+
+# i) Print out hit rates and speedup
+
+print(' Without cache : {:.1f} ms per frame'.format(1000*t_plain/n_frames))
+print(' With cache    : {:.1f} ms per frame, hits {}, misses {}, hit rate {:.3f}, {} bytes'.format(
+      1000*t_cache/n_frames, cache.hits, cache.misses, cache.hits/(cache.hits+cache.misses), cache.n_bytes))
+print(' Speedup : {:.1f}'.format(t_plain/t_cache))
+print(' Maximum difference of distances : {}'.format(np.max(np.abs(np.array(d_plain)-np.array(d_cache)))))
+print(' Capped cache  : hits {}, misses {}, evictions {}'.format(cache_small.hits, cache_small.misses, cache_small.evictions))
@@ -0,0 +1,129 @@
+"""
+The goal of this script is to compare three ways of post-processing the results
+of ambiguity resolution for frames of pixels: A loop over pixels computing the
+residuals, wrapped residuals, weighted norms and complex residuals one pixel at
+a time as done in MP_minimal_example.py; Compute_diagnostics of Diagnostics_AR
+allocating new arrays per frame; and a Residual_diagnostics object writing into
+buffers allocated once. Time per frame and peak memory allocated per frame are
+measured with tracemalloc; the results of all three are compared.
+For this, do the following:
+    1. Definitions and imports
+    2. Simulate and resolve a frame
+    3. Time post-processing
+    4. Compare results
+
+"""
+
+"""
+    1. Definitions and imports -----------------------------------------------
+"""
+
+
+
+# i) Imports
+
+
+import numpy as np
+import time
+import tracemalloc
+import Ambiguity_resolution as AR
+import Diagnostics_AR as dg
+import Support_funs_AR as sf
+
+
+# ii) Basic definitions
+
+n_obs=10
+n_pixels=20000
+n_frames=5
+seed=0
+
+wavelengths=np.linspace(0.01,0.05,n_obs)
+phase_variances=np.ones([n_obs])*0.01
+phase_weights=AR.Pseudo_reciprocal(np.sqrt(phase_variances))
+optim_opts=sf.Setup_optim_options(n_obs, d_upper=20, backend='lookup')
+
+rng=sf.Setup_rng(seed)
+
+
+
+"""
+    2. Simulate and resolve a frame ------------------------------------------
+"""
+
+
+# i) Noisy single surface observations and their solutions
+
+d_true=rng.uniform(0,10,[n_pixels,1])
+observations=sf.Generate_data_noisy_batch(np.ones([1]),d_true,wavelengths,phase_variances,rng=rng)
+d,N,_=AR.Ambiguity_resolution_batch(observations, wavelengths, phase_variances, optim_opts)
+
+
+
+"""
+    3. Time post-processing --------------------------------------------------
+"""
+
+
+# i) Loop over pixels
+
+def Loop_diagnostics():
+    r=np.zeros([n_pixels,n_obs])
+    r_wrapped=np.zeros([n_pixels,n_obs])
+    phasors=np.zeros([n_pixels,n_obs],dtype=complex)
+    l1=np.zeros([n_pixels])
+    l2=np.zeros([n_pixels])
+    for k in range(n_pixels):
+        r[k,:]=2*np.pi*(2*d[k]*AR.Pseudo_reciprocal(wavelengths)-N[k,:])-np.angle(observations[k,:])
+        phasors[k,:]=np.exp(1j*r[k,:])
+        r_wrapped[k,:]=np.angle(phasors[k,:])
+        l1[k]=np.linalg.norm(phase_weights*r_wrapped[k,:],ord=1)
+        l2[k]=np.linalg.norm(phase_weights*r_wrapped[k,:],ord=2)
+    return {'r' : r, 'r_wrapped' : r_wrapped, 'phasors' : phasors, 'l1' : l1, 'l2' : l2}
+
+
+# ii) Vectorized with and without preallocated buffers
+
+diagnostics=dg.Residual_diagnostics(wavelengths, phase_variances)
+buffers=diagnostics.allocate(n_pixels)
+
+variants={'Loop over pixels' : Loop_diagnostics,
+          'Compute_diagnostics' : lambda: dg.Compute_diagnostics(d, N, observations, wavelengths, phase_variances),
+          'Preallocated buffers' : lambda: diagnostics.compute(d, N, observations, out=buffers)}
+
+
+# iii) Time per frame and peak memory allocated per frame
+
+results={}
+performance={}
+
+for name,function in variants.items():
+    results[name]=function()
+    tracemalloc.start()
+    function()
+    peak=tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    t_start=time.perf_counter()
+    for _ in range(n_frames):
+        function()
+    performance[name]=((time.perf_counter()-t_start)/n_frames, peak)
+
+
+
+"""
+    4. Compare results -------------------------------------------------------
+"""
+
+
+# i) Print out time and memory per frame
+
+for name,(t,peak) in performance.items():
+    print(' {:20s} : {:8.2f} ms per frame, {:8.1f} kB allocated per frame'.format(name, 1000*t, peak/1024))
+
+
+# ii) Maximum differences to the loop
+
+for name in ['Compute_diagnostics','Preallocated buffers']:
+    print(' {:20s} : maximum difference to loop {:.2e}'.format(name, max(np.max(np.abs(results[name][key]-results['Loop over pixels'][key]))
+          for key in ['r','r_wrapped','phasors','l1','l2'])))
+print(' Flagged pixels : {}'.format(np.count_nonzero(buffers['flags'])))
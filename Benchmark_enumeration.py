@@ -0,0 +1,103 @@
+"""
+The goal of this script is to compare the exact enumeration of phase wrap points
+to the mixed integer linear program solved by GLPK_MI with respect to latency
+and the achieved objective function values.
+For this, do the following:
+    1. Definitions and imports
+    2. Simulate data
+    3. Time both approaches
+    4. Compare results
+
+"""
+
+"""
+    1. Definitions and imports -----------------------------------------------
+"""
+
+
+
+# i) Imports
+
+
+import numpy as np
+import Ambiguity_resolution as AR
+import time
+
+
+# ii) Basic definitions
+
+n_obs=10
+n_trials=100
+
+wavelengths=np.linspace(0.01,0.05,n_obs)
+phase_variances=np.ones([n_obs])*0.01
+
+cons=['d_opt>=0']+['N_opt[{}]>=0'.format(k) for k in range(n_obs)]+['d_opt<=20']
+optim_opts_milp={'max_iter':300, 'constraints':cons, 'backend':'milp', 'solver':'GLPK_MI'}
+optim_opts_enum={'max_iter':300, 'constraints':cons, 'backend':'enumeration'}
+
+
+
+"""
+    2. Simulate data ---------------------------------------------------------
+"""
+
+
+# i) Generate noisy single surface observations
+
+distances_true=np.random.uniform(0,10,[n_trials])
+phase_noise=np.random.normal(0,np.sqrt(phase_variances),[n_trials,n_obs])
+observations=np.exp(1j*(4*np.pi*distances_true[:,np.newaxis]/wavelengths[np.newaxis,:]+phase_noise))
+
+
+
+"""
+    3. Time both approaches --------------------------------------------------
+"""
+
+
+# i) Set up resolvers
+
+resolver_milp=AR.Setup_resolver(wavelengths, phase_variances, optim_opts_milp)
+resolver_enum=AR.Setup_resolver(wavelengths, phase_variances, optim_opts_enum)
+
+
+# ii) Solve and record latencies and objective function values
+
+t_milp=np.zeros([n_trials])
+t_enum=np.zeros([n_trials])
+obj_milp=np.zeros([n_trials])
+obj_enum=np.zeros([n_trials])
+d_milp=np.zeros([n_trials])
+d_enum=np.zeros([n_trials])
+
+for k in range(n_trials):
+    t_start=time.perf_counter()
+    d_milp[k],_,r_milp=resolver_milp.solve(observations[k,:])
+    t_milp[k]=time.perf_counter()-t_start
+
+    t_start=time.perf_counter()
+    d_enum[k],_,r_enum=resolver_enum.solve(observations[k,:])
+    t_enum[k]=time.perf_counter()-t_start
+
+    obj_milp[k]=np.linalg.norm(r_milp/np.sqrt(phase_variances),1)
+    obj_enum[k]=np.linalg.norm(r_enum/np.sqrt(phase_variances),1)
+
+
+
+"""
+    4. Compare results -------------------------------------------------------
+"""
+
+
+# i) Print out latencies
+
+print(' GLPK_MI     : median latency {:.3f} ms, mean latency {:.3f} ms'.format(1000*np.median(t_milp),1000*np.mean(t_milp)))
+print(' Enumeration : median latency {:.3f} ms, mean latency {:.3f} ms'.format(1000*np.median(t_enum),1000*np.mean(t_enum)))
+print(' Speedup of median latency : {:.1f}'.format(np.median(t_milp)/np.median(t_enum)))
+
+
+# ii) Print out agreement of solutions
+
+print(' Maximum difference of objective function values : {}'.format(np.max(np.abs(obj_milp-obj_enum))))
+print(' Nr of differing distances : {}'.format(np.sum(np.abs(d_milp-d_enum)>=0.00001)))
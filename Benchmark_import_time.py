@@ -0,0 +1,110 @@
+"""
+The goal of this script is to track the startup time of fresh processes, e.g.
+per-request workers. Each measurement runs in a new interpreter: First, the
+import time of every module is taken from the output of python -X importtime.
+Second, the wall time of importing Ambiguity_resolution and performing the
+first solve is measured for every backend together with the heavy solver
+dependencies that have been loaded. Backends that only rely on numpy must not
+load cvxpy or scipy; such regressions are reported.
+For this, do the following:
+    1. Definitions and imports
+    2. Measure import times
+    3. Measure first solves
+    4. Compare results
+
+"""
+
+"""
+    1. Definitions and imports -----------------------------------------------
+"""
+
+
+
+# i) Imports
+
+
+import os
+import subprocess
+import sys
+
+
+# ii) Basic definitions
+
+modules=['Support_funs_AR', 'Ambiguity_resolution', 'IO_AR', 'Lookup_index_AR', 'Mixed_pixel_AR', 'Benchmark_suite_AR']
+backends=['enumeration', 'coarse_to_fine', 'fast_path', 'lookup', 'scipy_milp', 'milp']
+heavy_modules=['cvxpy', 'scipy.optimize', 'scipy.spatial', 'scipy.stats', 'scipy.sparse']
+numpy_only_backends=['enumeration', 'coarse_to_fine']
+
+path_repo=os.path.dirname(os.path.abspath(__file__))
+
+
+# iii) Program of the fresh interpreter for the first solve of a backend
+
+program_solve="""
+import sys, time
+t_start=time.perf_counter()
+import numpy as np
+import Ambiguity_resolution as AR
+import Support_funs_AR as sf
+t_import=time.perf_counter()
+wavelengths=np.geomspace(0.01,50,10)
+optim_opts=sf.Setup_optim_options(10, d_upper=20, backend='{}')
+observations,_=sf.Generate_data(np.ones([1]),np.array([5.0]),wavelengths)
+AR.Ambiguity_resolution(observations, wavelengths, np.ones([10])*0.01, optim_opts)
+t_solve=time.perf_counter()
+print(t_import-t_start, t_solve-t_import, ','.join(m for m in {} if m in sys.modules))
+"""
+
+
+
+"""
+    2. Measure import times --------------------------------------------------
+"""
+
+
+# i) Cumulative import time in microseconds of the module itself
+
+t_import={}
+
+for module in modules:
+    output=subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import '+module],
+                          cwd=path_repo, capture_output=True, text=True).stderr
+    lines=[line.split('|') for line in output.splitlines() if line.startswith('import time:')]
+    t_import[module]=[int(line[1]) for line in lines if line[2].strip()==module][0]
+
+
+
+"""
+    3. Measure first solves --------------------------------------------------
+"""
+
+
+# i) Import, first solve and loaded heavy modules per backend
+
+t_first={}
+
+for backend in backends:
+    output=subprocess.run([sys.executable, '-c', program_solve.format(backend,heavy_modules)],
+                          cwd=path_repo, capture_output=True, text=True).stdout.split()
+    t_first[backend]=(float(output[0]), float(output[1]), output[2] if len(output)>2 else '')
+
+
+
+"""
+    4. Compare results -------------------------------------------------------
+"""
+
+
+# i) Print out import times
+
+for module in modules:
+    print(' import {:22s} : {:8.1f} ms'.format(module, t_import[module]/1000))
+
+
+# ii) Print out first solves and flag regressions
+
+for backend in backends:
+    t_module,t_solve,loaded=t_first[backend]
+    print(' {:15s} : import {:6.1f} ms, first solve {:8.1f} ms, loaded [{}]'.format(backend, 1000*t_module, 1000*t_solve, loaded))
+    if backend in numpy_only_backends and loaded!='':
+        print('   regression: backend {} loads {}'.format(backend, loaded))
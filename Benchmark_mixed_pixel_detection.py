@@ -0,0 +1,146 @@
+"""
+The goal of this script is to evaluate the detection of mixed pixels by the
+tests of Mixed_pixel_AR.Detect_mixed_pixels with respect to their receiver
+operating characteristic (ROC) and throughput. Single surface pixels and mixed
+pixels of two surfaces with random weight ratios are simulated, resolved under
+the single surface assumption and tested. The throughput of the detector is
+compared to that of the mixed pixel resolver which only needs to be run on the
+flagged pixels. As the simulation only adds phase noise, the amplitudes of
+single surface pixels are exactly constant and the amplitude test separates
+perfectly; on real data, amplitude noise determines amplitude_threshold.
+For this, do the following:
+    1. Definitions and imports
+    2. Simulate and resolve data
+    3. Detect and time
+    4. Compare results
+
+"""
+
+"""
+    1. Definitions and imports -----------------------------------------------
+"""
+
+
+
+# i) Imports
+
+
+import numpy as np
+import Support_funs_AR as sf
+import Ambiguity_resolution as AR
+import Mixed_pixel_AR as mp
+import time
+
+import matplotlib.pyplot as plt
+
+
+# ii) Basic definitions
+
+n_obs=10
+n_pixels=2000
+seed=0
+
+wavelengths=np.linspace(0.01,0.05,n_obs)
+phase_variances=np.ones([n_obs])*0.01
+optim_opts=sf.Setup_optim_options(n_obs, d_upper=20, backend='coarse_to_fine')
+
+rng=sf.Setup_rng(seed)
+
+
+
+"""
+    2. Simulate and resolve data ---------------------------------------------
+"""
+
+
+# i) Single surface pixels and mixed pixels with weight ratios in [0.05,1]
+
+d_single=rng.uniform(0,10,[n_pixels,1])
+observations_single=sf.Generate_data_noisy_batch(np.ones([1]),d_single,wavelengths,phase_variances,rng=rng)
+
+d_mixed=rng.uniform(0,10,[n_pixels,2])
+weights_mixed=np.column_stack((np.ones([n_pixels]),rng.uniform(0.05,1,[n_pixels])))
+observations_mixed=sf.Generate_data_noisy_batch(weights_mixed,d_mixed,wavelengths,phase_variances,rng=rng)
+
+observations=np.vstack((observations_single,observations_mixed))
+is_mixed=np.concatenate((np.zeros([n_pixels],dtype=bool),np.ones([n_pixels],dtype=bool)))
+
+
+# ii) Resolve all pixels under the single surface assumption
+
+resolver=AR.Setup_resolver(wavelengths, phase_variances, optim_opts)
+
+t_start=time.perf_counter()
+_,_,residuals=AR.Ambiguity_resolution_batch(observations, wavelengths, phase_variances, optim_opts, resolver=resolver)
+t_resolve=time.perf_counter()-t_start
+
+
+
+"""
+    3. Detect and time -------------------------------------------------------
+"""
+
+
+# i) Test statistics and flags with default thresholds, first call imports
+# scipy.special and is not timed
+
+mp.Detect_mixed_pixels(observations[:1,:], phase_variances, residuals[:1,:])
+
+t_start=time.perf_counter()
+flags,chi2_stat,amplitude_cv=mp.Detect_mixed_pixels(observations, phase_variances, residuals)
+t_detect=time.perf_counter()-t_start
+
+
+# ii) Mixed pixel resolver on a subset of the flagged pixels
+
+mp_resolver=mp.Mixed_pixel_resolver(wavelengths, phase_variances, optim_opts)
+index_flagged=np.flatnonzero(flags)[:500]
+
+t_start=time.perf_counter()
+mp_resolver.solve_batch(observations[index_flagged,:])
+t_unmix=(time.perf_counter()-t_start)/len(index_flagged)
+
+
+# iii) ROC curves of both statistics by sweeping their thresholds
+
+def Roc_curve(statistic, is_mixed):
+    thresholds=np.sort(statistic)[::-1]
+    stat_mixed=np.sort(statistic[is_mixed])
+    stat_single=np.sort(statistic[~is_mixed])
+    tpr=(len(stat_mixed)-np.searchsorted(stat_mixed,thresholds,side='left'))/len(stat_mixed)
+    fpr=(len(stat_single)-np.searchsorted(stat_single,thresholds,side='left'))/len(stat_single)
+    return np.concatenate(([0],fpr)), np.concatenate(([0],tpr))
+
+fpr_chi2,tpr_chi2=Roc_curve(chi2_stat,is_mixed)
+fpr_amplitude,tpr_amplitude=Roc_curve(amplitude_cv,is_mixed)
+
+
+
+"""
+    4. Compare results -------------------------------------------------------
+"""
+
+
+# i) Print out detection rates and throughput
+
+print(' Default thresholds : detection rate {:.3f}, false alarm rate {:.3f}'.format(np.mean(flags[is_mixed]),np.mean(flags[~is_mixed])))
+print(' AUC residual chi2 test : {:.3f}'.format(np.sum(np.diff(fpr_chi2)*(tpr_chi2[1:]+tpr_chi2[:-1])/2)))
+print(' AUC amplitude test : {:.3f}'.format(np.sum(np.diff(fpr_amplitude)*(tpr_amplitude[1:]+tpr_amplitude[:-1])/2)))
+print(' Detection : {:.2f} us per pixel'.format(1e6*t_detect/len(observations)))
+print(' Single surface resolution : {:.2f} ms per pixel'.format(1e3*t_resolve/len(observations)))
+print(' Mixed pixel resolution : {:.2f} ms per flagged pixel'.format(1e3*t_unmix))
+
+
+# ii) Illustrate ROC curves
+
+w,h=plt.figaspect(1)
+fig1 = plt.figure(dpi=400,constrained_layout=True,figsize=(w,h))
+
+plt.plot(fpr_chi2,tpr_chi2, color='black', label='Residual chi2 test')
+plt.plot(fpr_amplitude,tpr_amplitude, color='0.5', linestyle='dashed', label='Amplitude test')
+plt.scatter(np.mean(flags[~is_mixed]),np.mean(flags[is_mixed]), color='black', marker='x', label='Default thresholds')
+
+plt.xlabel('False alarm rate')
+plt.ylabel('Detection rate')
+plt.title('ROC of mixed pixel detection')
+plt.legend()
@@ -0,0 +1,102 @@
+"""
+The goal of this script is to compare the per-call latency of the function
+Ambiguity_resolution that formulates a new optimization problem on every call
+to the class Ambiguity_resolver that formulates the problem once and only
+updates the observed phases for subsequent calls.
+For this, do the following:
+    1. Definitions and imports
+    2. Simulate data
+    3. Time both approaches
+    4. Compare results
+
+"""
+
+"""
+    1. Definitions and imports -----------------------------------------------
+"""
+
+
+
+# i) Imports
+
+
+import numpy as np
+import Ambiguity_resolution as AR
+import time
+
+
+# ii) Basic definitions
+
+n_obs=10
+n_trials=50
+
+wavelengths=np.linspace(0.01,0.05,n_obs)
+phase_variances=np.ones([n_obs])*0.01
+
+cons=['d_opt>=0']+['N_opt[{}]>=0'.format(k) for k in range(n_obs)]+['d_opt<=20']
+optim_opts={'max_iter':300, 'constraints':cons}
+
+
+
+"""
+    2. Simulate data ---------------------------------------------------------
+"""
+
+
+# i) Generate noise-free single surface observations
+
+distances_true=np.random.uniform(0,10,[n_trials])
+observations=np.exp(1j*4*np.pi*distances_true[:,np.newaxis]/wavelengths[np.newaxis,:])
+
+
+
+"""
+    3. Time both approaches --------------------------------------------------
+"""
+
+
+# i) Function formulating the problem on every call
+
+t_function=np.zeros([n_trials])
+d_function=np.zeros([n_trials])
+
+for k in range(n_trials):
+    t_start=time.perf_counter()
+    d,_,_=AR.Ambiguity_resolution(observations[k,:], wavelengths, phase_variances, optim_opts)
+    t_function[k]=time.perf_counter()-t_start
+    d_function[k]=d
+
+
+# ii) Resolver formulating the problem once
+
+t_start=time.perf_counter()
+resolver=AR.Ambiguity_resolver(wavelengths, phase_variances, optim_opts)
+t_setup=time.perf_counter()-t_start
+
+t_resolver=np.zeros([n_trials])
+d_resolver=np.zeros([n_trials])
+
+for k in range(n_trials):
+    t_start=time.perf_counter()
+    d,_,_=resolver.solve(observations[k,:])
+    t_resolver[k]=time.perf_counter()-t_start
+    d_resolver[k]=d
+
+
+
+"""
+    4. Compare results -------------------------------------------------------
+"""
+
+
+# i) Print out latencies
+
+print(' Function : median latency {:.2f} ms, mean latency {:.2f} ms'.format(1000*np.median(t_function),1000*np.mean(t_function)))
+print(' Resolver : median latency {:.2f} ms, mean latency {:.2f} ms (one-time setup {:.2f} ms)'.format(1000*np.median(t_resolver),1000*np.mean(t_resolver),1000*t_setup))
+print(' Speedup of median latency : {:.2f}'.format(np.median(t_function)/np.median(t_resolver)))
+
+
+# ii) Print out agreement of solutions
+
+print(' Maximum difference between estimated distances : {}'.format(np.max(np.abs(d_function-d_resolver))))
+print(' Failures (function, resolver) : {}, {}'.format(np.sum(np.abs(d_function-distances_true)>=0.00001),np.sum(np.abs(d_resolver-distances_true)>=0.00001)))
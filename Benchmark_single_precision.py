@@ -0,0 +1,189 @@
+"""
+The goal of this script is to check where single precision (complex64 and
+float32) is accurate enough for ambiguity resolution and to measure the memory
+and time it saves. Three accuracy checks are performed for several wavelength
+sets and maximum distances: The phase error of complex64 observations, once
+computed with phases wrapped in double precision as done by Support_funs_AR
+and once naively in single precision; the error of the residuals computed by
+Residuals_batch in float32, which is expected to grow like
+4*pi*d_max/lambda_min*2^-23; and the fraction of pixels whose wavecycles
+resolved from complex64 observations agree with those from complex128
+observations. Single precision is considered sufficient if the residual error
+stays below a tenth of the phase noise standard deviation. Memory and
+throughput are compared for generating data, computing residuals and writing
+and reading raw observation files.
+For this, do the following:
+    1. Definitions and imports
+    2. Accuracy checks
+    3. Memory and throughput
+    4. Compare results
+
+"""
+
+"""
+    1. Definitions and imports -----------------------------------------------
+"""
+
+
+
+# i) Imports
+
+
+import numpy as np
+import os
+import tempfile
+import time
+import tracemalloc
+import Ambiguity_resolution as AR
+import IO_AR as io
+import Support_funs_AR as sf
+
+
+# ii) Basic definitions
+
+n_obs=10
+seed=0
+
+wavelength_sets={'linspace(0.01,0.05)' : np.linspace(0.01,0.05,n_obs),
+                 'geomspace(0.01,50)' : np.geomspace(0.01,50,n_obs),
+                 'linspace(1,5)' : np.linspace(1,5,n_obs)}
+d_max_list=[1, 10, 100, 1000, 10000]
+d_max_resolve=[1, 10, 100]
+
+phase_variances=np.ones([n_obs])*0.01
+phase_std=np.sqrt(phase_variances[0])
+
+n_pixels_accuracy=2000
+n_pixels_resolve=100
+n_pixels_throughput=200000
+n_repetitions=5
+
+rng=sf.Setup_rng(seed)
+
+
+
+"""
+    2. Accuracy checks -------------------------------------------------------
+"""
+
+
+# i) Phase errors of complex64 observations and float32 residuals
+
+accuracy={}
+
+for name,wavelengths in wavelength_sets.items():
+    lambda_vec_pinv=AR.Pseudo_reciprocal(wavelengths)
+    for d_max in d_max_list:
+        d_true=rng.uniform(0,d_max,[n_pixels_accuracy,1])
+        z64=sf.Generate_data_batch(np.ones([1]),d_true,wavelengths)
+        z32=sf.Generate_data_batch(np.ones([1]),d_true,wavelengths,dtype='complex64')
+        z32_naive=np.exp(1j*(4*np.float32(np.pi)*d_true.astype(np.float32)/wavelengths.astype(np.float32)))
+
+        error_wrapped=np.max(np.abs(np.angle(z32*np.conj(z64))))
+        error_naive=np.max(np.abs(np.angle(z32_naive*np.conj(z64))))
+
+        d=d_true[:,0]
+        phi_obs=np.angle(z64)
+        N=np.round(2*d[:,np.newaxis]*lambda_vec_pinv-phi_obs/(2*np.pi))
+        r64=AR.Residuals_batch(d, N, phi_obs, lambda_vec_pinv)
+        r32=AR.Residuals_batch(d, N.astype(np.float32), phi_obs.astype(np.float32), lambda_vec_pinv, 'float32')
+        error_residuals=np.max(np.abs(r32-r64))
+        error_estimate=4*np.pi*d_max/np.min(wavelengths)*2.0**-23
+
+        accuracy[name,d_max]=(error_wrapped, error_naive, error_residuals, error_estimate)
+
+
+# ii) Agreement of resolved wavecycles from noisy complex64 and complex128
+# observations drawn from the same random stream
+
+agreement={}
+
+for name,wavelengths in wavelength_sets.items():
+    for d_max in d_max_resolve:
+        optim_opts=sf.Setup_optim_options(n_obs, d_upper=d_max, backend='coarse_to_fine')
+        resolver=AR.Setup_resolver(wavelengths, phase_variances, optim_opts)
+        d_true=rng.uniform(0,d_max,[n_pixels_resolve,1])
+        z64=sf.Generate_data_noisy_batch(np.ones([1]),d_true,wavelengths,phase_variances,rng=seed)
+        z32=sf.Generate_data_noisy_batch(np.ones([1]),d_true,wavelengths,phase_variances,rng=seed,dtype='complex64')
+
+        d64,N64,_=AR.Ambiguity_resolution_batch(z64, wavelengths, phase_variances, optim_opts, resolver=resolver)
+        d32,N32,_=AR.Ambiguity_resolution_batch(z32, wavelengths, phase_variances, dict(optim_opts,dtype='float32'), resolver=resolver)
+
+        agreement[name,d_max]=(np.mean(np.all(N64==N32,axis=1)), np.max(np.abs(d64-d32)))
+
+
+
+"""
+    3. Memory and throughput -------------------------------------------------
+"""
+
+
+# i) Peak memory and time of generating noisy data
+
+wavelengths=wavelength_sets['linspace(0.01,0.05)']
+lambda_vec_pinv=AR.Pseudo_reciprocal(wavelengths)
+d_true=rng.uniform(0,10,[n_pixels_throughput,1])
+
+def Measure(function):
+    tracemalloc.start()
+    result=function()
+    peak=tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    t_start=time.perf_counter()
+    for _ in range(n_repetitions):
+        function()
+    return result, peak, (time.perf_counter()-t_start)/n_repetitions
+
+performance={}
+
+for dtype,real_dtype in (('complex128','float64'),('complex64','float32')):
+    z,peak,t=Measure(lambda: sf.Generate_data_noisy_batch(np.ones([1]),d_true,wavelengths,phase_variances,rng=seed,dtype=dtype))
+    performance['Generate_data_noisy_batch',dtype]=(z.nbytes, peak, t)
+
+
+    # ii) Residuals from given distances and wavecycles
+
+    phi_obs=np.angle(z)
+    d=d_true[:,0]
+    N=np.round(2*d[:,np.newaxis]*lambda_vec_pinv-phi_obs/(2*np.pi)).astype(real_dtype)
+    r,peak,t=Measure(lambda: AR.Residuals_batch(d, N, phi_obs, lambda_vec_pinv, real_dtype))
+    performance['Residuals_batch',dtype]=(r.nbytes, peak, t)
+
+
+    # iii) Writing and reading a raw observation file
+
+    with tempfile.TemporaryDirectory() as path_dir:
+        path=os.path.join(path_dir,'observations.bin')
+        t_start=time.perf_counter()
+        io.Write_observations(path, z, dtype=dtype, append=False)
+        t_write=time.perf_counter()-t_start
+        t_start=time.perf_counter()
+        np.angle(io.Open_observations(path, n_obs, dtype))
+        t_read=time.perf_counter()-t_start
+        performance['Write_observations',dtype]=(os.path.getsize(path), 0, t_write)
+        performance['Open_observations + angle',dtype]=(os.path.getsize(path), 0, t_read)
+
+
+
+"""
+    4. Compare results -------------------------------------------------------
+"""
+
+
+# i) Print out accuracy
+
+print(' Wavelengths         |  d_max | phase error wrapped | phase error naive | residual error | estimate | float32 sufficient')
+for (name,d_max),(error_wrapped,error_naive,error_residuals,error_estimate) in accuracy.items():
+    print(' {:19s} | {:6d} | {:19.2e} | {:17.2e} | {:14.2e} | {:8.2e} | {}'.format(name, d_max, error_wrapped,
+          error_naive, error_residuals, error_estimate, error_residuals<0.1*phase_std))
+
+print(' Wavelengths         |  d_max | agreement of N | max difference of d')
+for (name,d_max),(fraction,d_difference) in agreement.items():
+    print(' {:19s} | {:6d} | {:14.3f} | {:.2e}'.format(name, d_max, fraction, d_difference))
+
+
+# ii) Print out memory and throughput
+
+print(' Operation                  | dtype      | result [MB] | peak [MB] | time [ms]')
+for (operation,dtype),(n_bytes,peak,t) in performance.items():
+    print(' {:26s} | {:10s} | {:11.1f} | {:9.1f} | {:9.1f}'.format(operation, dtype, n_bytes/2**20, peak/2**20, 1000*t))
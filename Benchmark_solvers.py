@@ -0,0 +1,82 @@
+"""
+The goal of this script is to compare the latency of the mixed integer solvers
+available through cvxpy when solving the ambiguity resolution problem on the
+configurations of AR_minimal_example.py and Compare_global_to_MILP.py. The
+ranking determines the default solver chosen by Solver_arguments. The direct
+sparse formulation solved by scipy.optimize.milp (backend 'scipy_milp') shows
+the overhead of the cvxpy modeling layer on top of HiGHS.
+For this, do the following:
+    1. Definitions and imports
+    2. Run the benchmark
+    3. Compare results
+
+"""
+
+"""
+    1. Definitions and imports -----------------------------------------------
+"""
+
+
+
+# i) Imports
+
+
+import numpy as np
+import cvxpy as cp
+import Benchmark_suite_AR as bs
+
+
+# ii) Basic definitions
+
+n_obs=10
+n_trials=50
+seed=0
+
+wavelength_sets={'linear_10' : np.linspace(0.01,0.05,n_obs)}
+phase_variance=0.01
+
+
+# iii) Register one backend per installed solver
+
+solvers=[solver for solver in ['CBC', 'GLPK_MI', 'SCIP', 'HIGHS'] if solver in cp.installed_solvers()]
+backends=[]
+
+for solver in solvers:
+    bs.Register_benchmark_backend('milp_'+solver, bs.Resolver_factory('milp', solver=solver))
+    backends=backends+['milp_'+solver]
+
+backends=backends+['scipy_milp']
+
+
+
+"""
+    2. Run the benchmark -----------------------------------------------------
+"""
+
+
+# i) AR_minimal_example: noisy observations of a surface at distance 5
+
+results_minimal=bs.Run_benchmark(wavelength_sets, backends, n_trials=n_trials, phase_variance=phase_variance,
+                                 d_range=(5,5), d_max=20, noisy=True, tolerance=0.003, seed=seed)
+
+
+# ii) Compare_global_to_MILP: noise-free observations, distances uniform in [0,10]
+
+results_compare=bs.Run_benchmark(wavelength_sets, backends, n_trials=n_trials, phase_variance=phase_variance,
+                                 d_range=(0,10), d_max=20, noisy=False, seed=seed)
+
+
+
+"""
+    3. Compare results -------------------------------------------------------
+"""
+
+
+# i) Print out results
+
+for name,results in [('AR_minimal_example',results_minimal),('Compare_global_to_MILP',results_compare)]:
+    print(' Configuration {}'.format(name))
+    for result in results:
+        print('   {:12s} : failed {} of {} times, p50 {:.2f} ms, p95 {:.2f} ms, {:.1f} solves/s'.format(
+              result['backend'], result['n_failures'], result['n_trials'], 1000*result['p50_latency_s'],
+              1000*result['p95_latency_s'], result['throughput_per_s']))
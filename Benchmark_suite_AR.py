@@ -0,0 +1,313 @@
+"""
+This file provides a reusable benchmark suite for comparing methods of solution
+for the ambiguity resolution problem with respect to latency and accuracy.
+The functions are:
+    Run_benchmark: Runs Monte Carlo trials for several wavelength sets and
+        backends and records latencies, failure rates and throughput
+    Register_benchmark_backend: Makes an additional backend available
+    Resolver_factory: Creates a backend from a resolver of Ambiguity_resolution
+    Write_benchmark_json: Writes benchmark results to a JSON file
+    Write_benchmark_csv: Writes benchmark results to a CSV file
+"""
+
+
+
+
+def Run_benchmark(wavelength_sets, backends=None, n_trials=100, phase_variance=0.01, d_range=(0,10), d_max=20, noisy=False, tolerance=0.00001, seed=None):
+    """
+    The goal of this function is to run Monte Carlo trials in which single
+    surface observations with random distances are simulated and resolved with
+    several backends for several sets of wavelengths. For each combination of
+    wavelength set and backend, the wall time of every single solve is recorded
+    and summarized into latency percentiles, throughput and failure rates.
+
+    For this, do the following:
+        1. Imports and definitions
+        2. Simulate data
+        3. Solve and record
+        4. Summarize results
+
+    INPUTS
+    The inputs consist in the wavelength sets and backends to be compared and in
+    properties of the simulation. All backends receive the same observations.
+    Randomized backends receive a random generator of their own, spawned from
+    seed, as entry "rng" of optim_opts so that a fixed seed reproduces all
+    results.
+
+    Name                 Interpretation                             Type
+    wavelength_sets     Named sets of wavelengths                   dict {name: vector}
+    backends            Names of registered backends, defaults      list of strings
+                        to all registered backends
+    n_trials            Number of trials per wavelength set         positive integer
+    phase_variance      Variance of the phase noise, also used      positive number
+                        as assumed variance by the solvers
+    d_range             Interval of the true distances              tuple (min, max)
+    d_max               Upper bound on the estimated distance       positive number
+    noisy               Add phase noise onto the observations       boolean
+    tolerance           Maximum absolute distance error not         positive number
+                        counted as failure
+    seed                Source of randomness for the simulation     see Support_funs_AR.Setup_rng
+                        and for randomized backends
+
+
+    OUTPUTS
+    The outputs consist in a list of records, one per combination of wavelength
+    set and backend, that can be written to JSON or CSV.
+
+    Name                 Interpretation                             Type
+    results            Summaries of latencies and failures          list of dict
+
+
+    """
+
+
+
+    """
+        1. Imports and definitions -------------------------------------------
+    """
+
+
+    # i) Import packages
+
+    import numpy as np
+    import time
+    import Support_funs_AR as sf
+
+
+    # ii) Random generator and backends
+
+    rng=sf.Setup_rng(seed)
+
+    if backends is None:
+        backends=list(benchmark_backends.keys())
+
+    results=[]
+
+
+    for set_name,wavelengths in wavelength_sets.items():
+
+        """
+            2. Simulate data -------------------------------------------------
+        """
+
+
+        # i) Definitions for the current wavelength set
+
+        wavelengths=np.asarray(wavelengths)
+        n_obs=len(wavelengths)
+        phase_variances=np.ones([n_obs])*phase_variance
+        optim_opts=sf.Setup_optim_options(n_obs, constraints=['d_opt<={}'.format(d_max)])
+
+
+        # ii) Generate observations
+
+        d_true=rng.uniform(d_range[0],d_range[1],[n_trials])
+        if noisy:
+            observations=sf.Generate_data_noisy_batch(np.ones([1]),d_true[:,np.newaxis],wavelengths,phase_variances,rng=rng)
+        else:
+            observations=sf.Generate_data_batch(np.ones([1]),d_true[:,np.newaxis],wavelengths)
+
+
+        for backend in backends:
+
+            """
+                3. Solve and record ------------------------------------------
+            """
+
+
+            # i) Set up the solver once per configuration, randomized backends
+            # draw from a stream spawned off the seed without advancing rng
+
+            rng_backend=sf.Spawn_rngs(rng.bit_generator.seed_seq,1)[0]
+
+            t_start=time.perf_counter()
+            solve=benchmark_backends[backend](wavelengths, phase_variances, dict(optim_opts, rng=rng_backend))
+            t_setup=time.perf_counter()-t_start
+
+
+            # ii) Time every solve
+
+            d_estimated=np.zeros([n_trials])
+            t_solve=np.zeros([n_trials])
+
+            for k in range(n_trials):
+                t_start=time.perf_counter()
+                d_estimated[k]=solve(observations[k,:])
+                t_solve[k]=time.perf_counter()-t_start
+
+
+
+            """
+                4. Summarize results -----------------------------------------
+            """
+
+
+            # i) Failures and latency statistics
+
+            n_failures=int(np.sum(~(np.abs(d_true-d_estimated)<tolerance)))
+            p50,p95,p99=np.percentile(t_solve,[50,95,99])
+
+            results.append({'wavelength_set' : set_name,
+                            'backend' : backend,
+                            'n_obs' : n_obs,
+                            'n_trials' : n_trials,
+                            'noisy' : bool(noisy),
+                            'n_failures' : n_failures,
+                            'failure_rate' : n_failures/n_trials,
+                            'setup_time_s' : t_setup,
+                            'total_time_s' : float(np.sum(t_solve)),
+                            'mean_latency_s' : float(np.mean(t_solve)),
+                            'p50_latency_s' : float(p50),
+                            'p95_latency_s' : float(p95),
+                            'p99_latency_s' : float(p99),
+                            'throughput_per_s' : n_trials/float(np.sum(t_solve))})
+
+
+    return results
+
+
+
+
+
+
+
+def Register_benchmark_backend(name, factory):
+    """
+    The goal of this function is to make an additional backend available to
+    Run_benchmark. The factory is called once per wavelength set with the
+    arguments (wavelengths, phase_variances, optim_opts) and has to return a
+    function mapping the complex observations [n_obs] to the estimated distance.
+    Randomized backends should draw all random numbers from the generator in
+    the entry "rng" of optim_opts.
+
+    Name                 Interpretation                             Type
+    name                Name of the backend                         string
+    factory             Constructor of the solve function           callable
+
+    """
+
+    benchmark_backends[name]=factory
+
+
+
+
+
+
+
+def Write_benchmark_json(results, path):
+    """
+    The goal of this function is to write the results of Run_benchmark together
+    with information on the environment to a JSON file so that they can be
+    tracked across releases.
+
+    Name                 Interpretation                             Type
+    results             Output of Run_benchmark                     list of dict
+    path                Path of the JSON file                       string
+
+    """
+
+    import json
+
+    with open(path,'w') as file:
+        json.dump({'environment' : _Environment_info(), 'results' : results}, file, indent=2)
+
+
+
+
+
+
+
+def Write_benchmark_csv(results, path):
+    """
+    The goal of this function is to write the results of Run_benchmark to a CSV
+    file with one row per combination of wavelength set and backend.
+
+    Name                 Interpretation                             Type
+    results             Output of Run_benchmark                     list of dict
+    path                Path of the CSV file                        string
+
+    """
+
+    import csv
+
+    with open(path,'w',newline='') as file:
+        writer=csv.DictWriter(file, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+
+
+
+
+
+def Resolver_factory(backend, **options):
+    """
+    The goal of this function is to create a factory for Register_benchmark_
+    backend from a backend of Ambiguity_resolution.Setup_resolver. Further 
+    keyword arguments override the entries of optim_opts, e.g. solver='CBC'.
+
+    Name                 Interpretation                             Type
+    backend             Name of the backend of Setup_resolver       string
+    options             Entries of optim_opts to override           keyword arguments
+    factory             Constructor of the solve function           callable
+
+    """
+
+    def factory(wavelengths, phase_variances, optim_opts):
+        import Ambiguity_resolution as AR
+
+        resolver=AR.Setup_resolver(wavelengths, phase_variances, dict(optim_opts, backend=backend, **options))
+
+        return lambda observations: resolver.solve(observations)[0]
+
+    return factory
+
+
+
+
+
+
+
+def _Environment_info():
+
+    # Versions and platform the benchmark has been run on
+
+    import platform
+    import time
+    import numpy as np
+
+    return {'timestamp' : time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python' : platform.python_version(),
+            'numpy' : np.__version__,
+            'platform' : platform.platform()}
+
+
+def _Setup_basinhopping(wavelengths, phase_variances, optim_opts):
+
+    # Global optimization of the l1 norm of wrapped phase residuals over d,
+    # the random steps are drawn from the generator of the benchmark
+
+    import numpy as np
+    import Support_funs_AR as sf
+    from scipy.optimize import basinhopping
+
+    rng=sf.Setup_rng(optim_opts.get('rng'))
+
+    def solve(observations):
+        def f(d):
+            return sf.Objective_sweep(observations,d,wavelengths)[0]
+
+        return basinhopping(f,1,niter=10,rng=rng).x[0]
+
+    return solve
+
+
+
+benchmark_backends={'GLPK_MILP' : Resolver_factory('milp', solver='GLPK_MI'),
+                    'enumeration' : Resolver_factory('enumeration'),
+                    'fast_path' : Resolver_factory('fast_path'),
+                    'scipy_milp' : Resolver_factory('scipy_milp'),
+                    'lookup' : Resolver_factory('lookup'),
+                    'coarse_to_fine' : Resolver_factory('coarse_to_fine'),
+                    'basinhopping' : _Setup_basinhopping}
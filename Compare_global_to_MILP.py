@@ -1,11 +1,13 @@
 """
 The goal of this script is to compare the ambiguity resolution function to a 
-guess of a distance employing a global solver directly for the distance d
+guess of a distance employing a global solver directly for the distance d. The
+comparison is carried out by the benchmark suite in Benchmark_suite_AR which
+records latencies and failure rates for all backends and writes them to JSON
+and CSV files for tracking across releases.
 For this, do the following:
     1. Definitions and imports
-    2. Simulate data
-    3. Solve the estimation problem 
-    4. Compare results from both methods
+    2. Run the benchmark
+    3. Compare results from all methods
 
 """
 
@@ -18,131 +20,56 @@ For this, do the following:
 # i) Imports
 
 
-import Support_funs_AR as sf
 import numpy as np
-import Ambiguity_resolution as AR
-import time
-
-from scipy.optimize import basinhopping
+import Benchmark_suite_AR as bs
 
 
 # ii) Basic definitions
 
 n_obs=10
 n_trials=1000
+seed=0
 
-weights=np.ones([1])
-wavelengths=np.linspace(0.01,0.05,n_obs)
-phase_variances=np.ones([n_obs])*0.01
+wavelength_sets={'linear_10' : np.linspace(0.01,0.05,n_obs),
+                 'geometric_10' : np.geomspace(0.01,50,n_obs)}
+backends=['GLPK_MILP', 'enumeration', 'fast_path', 'coarse_to_fine', 'basinhopping']
+phase_variance=0.01
 
 
-# iii) Objective function
+# iii) Output files
 
-def residuals(observations, weights,distances,wavelengths):
-    
-    observations_pred, _=sf.Generate_data(weights,distances,wavelengths)
-    phi_pred=np.angle(observations_pred)
-    phi_diff=np.angle(np.conj(observations)*observations_pred)
-    
-    return phi_diff, phi_pred
+path_json='benchmark_results.json'
+path_csv='benchmark_results.csv'
 
-def obj_fun(observations, weights,distances,wavelengths):
-    phi_residuals,_ = residuals(observations, weights,distances,wavelengths)
-    norm_resid=np.linalg.norm(phi_residuals,1)
-    return norm_resid
 
 
 """
-    2. Simulate data ---------------------------------------------------------
+    2. Run the benchmark -----------------------------------------------------
 """
 
 
-# i) Generate the data
-
-d_true=np.zeros([n_trials])
-d_estimated_AR=np.zeros([n_trials])
-d_estimated_AR_noisy=np.zeros([n_trials])
-d_estimated_global=np.zeros([n_trials])
-
-for k in range(n_trials):
-       
-    distance_true=np.random.uniform(0,10)
-    distances=distance_true*np.ones([1])
-    
-    observations, _=sf.Generate_data(weights,distances,wavelengths)
-    observations_noisy, _=sf.Generate_data_noisy(weights,distances,wavelengths,phase_variances)
-    
-    
-    
-    
-    """
-        3. Solve the estimation problem ------------------------------------------
-    """
-    
-    
-    # i) Solve the problem with our algorithm
-    
-    cons=['d_opt<=20']
-    optim_opts=sf.Setup_optim_options(n_obs, constraints=cons)
-    
-    d_AR,N_AR,r_AR=AR.Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts)
-    d_noise,N_noise,r_noise=AR.Ambiguity_resolution(observations_noisy, wavelengths, phase_variances,optim_opts)
-    
-    
-    # ii) Solve the problem with a global algorithm
-    
-    def f(d):
-        f_val=obj_fun(observations,weights,d,wavelengths)
-        return f_val
-    
-    d_global=basinhopping(f,1,niter=10, disp=True).x
-    
-    d_true[k]=distance_true
-    d_estimated_AR[k]=d_AR
-    d_estimated_AR_noisy[k]=d_noise
-    d_estimated_global[k]=d_global
-    
-
-
-"""
-    4. Compare results and ground truth ---------------------------------------
-"""
-
-
-
-# i) Print out results
-
-time.sleep(0.01)
-
-print('AR failed nr of times for our approach', np.sum(np.abs(d_true-d_estimated_AR)>=0.00001))
-print('AR failed nr of times for global approach', np.sum((np.abs(d_true-d_estimated_global)>=0.00001)))
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# i) Noise-free observations, distances drawn uniformly from [0,10]
 
+results=bs.Run_benchmark(wavelength_sets, backends, n_trials=n_trials, phase_variance=phase_variance,
+                         d_range=(0,10), d_max=20, seed=seed)
 
 
+# ii) Write out machine-readable results
 
+bs.Write_benchmark_json(results, path_json)
+bs.Write_benchmark_csv(results, path_csv)
 
 
 
+"""
+    3. Compare results from all methods --------------------------------------
+"""
 
 
+# i) Print out results
 
+for result in results:
+    print('{} / {} : failed {} of {} times, p50 {:.2f} ms, p95 {:.2f} ms, p99 {:.2f} ms, {:.1f} solves/s'.format(
+          result['wavelength_set'], result['backend'], result['n_failures'], result['n_trials'],
+          1000*result['p50_latency_s'], 1000*result['p95_latency_s'], 1000*result['p99_latency_s'],
+          result['throughput_per_s']))
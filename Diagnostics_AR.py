@@ -0,0 +1,278 @@
+"""
+This file provides a vectorized post-processing of the results of ambiguity
+resolution that is decoupled from the solvers. Given the distances and
+wavecycles of a batch of pixels together with their observations, the
+residuals, wrapped residuals, complex residual phasors, weighted l1 and l2
+norms and per-pixel quality flags are computed for all pixels in one pass.
+All outputs can be written into buffers allocated once so that processing
+frame after frame does not allocate any arrays.
+The flags are the bits of an unsigned integer per pixel:
+    FLAG_RESIDUAL: The weighted sum of squared wrapped residuals exceeds the
+        1-alpha quantile of the chi2 distribution, see Mixed_pixel_AR.
+        Detect_mixed_pixels
+    FLAG_AMPLITUDE: The coefficient of variation of the amplitudes exceeds
+        amplitude_threshold, see Mixed_pixel_AR.Detect_mixed_pixels
+    FLAG_WRAP: Some residual exceeds pi in magnitude, i.e. N is not the
+        nearest wavecycle vector for d
+    FLAG_NONFINITE: d or some residual is not finite
+The functions and classes are:
+    Residual_diagnostics: Precomputes a wavelength configuration and computes
+        the diagnostics of batches of pixels into preallocated buffers
+    Compute_diagnostics: Computes the diagnostics of one batch of pixels
+"""
+
+
+FLAG_RESIDUAL=1
+FLAG_AMPLITUDE=2
+FLAG_WRAP=4
+FLAG_NONFINITE=8
+
+
+
+
+class Residual_diagnostics:
+    """
+    The goal of this class is to compute diagnostics of the solutions of
+    ambiguity resolution for batches of pixels without loops over pixels and
+    without allocating arrays per batch. All quantities that depend only on
+    the wavelengths, the phase variances and the thresholds are computed once;
+    allocate() returns a dictionary of buffers for a given number of pixels
+    that compute() fills in place.
+
+    For this, do the following:
+        1. Definitions and imports
+    and on each call to compute():
+        2. Residuals and wrapped residuals
+        3. Norms and phasors
+        4. Quality flags
+
+    INPUTS
+    The inputs consist in the wavelengths and phase variances used for the
+    resolution, the thresholds of the tests of Mixed_pixel_AR.Detect_mixed_
+    pixels and the data type of the real valued outputs.
+
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    alpha               False alarm rate of the residual test       number in (0,1)
+    amplitude_threshold Maximum coefficient of variation of the     positive number
+                        amplitudes of a single surface
+    dtype               Data type of the outputs                    'float64' or 'float32'
+
+
+    OUTPUTS
+    The method compute(d, N, observations, out=None) returns a dictionary with
+    the following entries; if out is a dictionary returned by allocate(), the
+    entries are written into it and out is returned. Entries starting with an
+    underscore are work space.
+
+    Name                 Interpretation                             Type
+    r                  The unweighted residuals                     matrix [n_pixels,n_obs]
+    r_wrapped          The residuals wrapped to [-pi,pi]            matrix [n_pixels,n_obs]
+    phasors            The complex residuals exp(1j*r)              c-matrix [n_pixels,n_obs]
+    l1                 The l1 norm of the wrapped residuals         vector [n_pixels]
+                       weighted by the inverse phase std
+    l2                 The l2 norm of the wrapped residuals         vector [n_pixels]
+                       weighted by the inverse phase std
+    chi2               The squared l2 norm, the test statistic      vector [n_pixels]
+                       of FLAG_RESIDUAL
+    amplitude_cv       Coefficient of variation of amplitudes       vector [n_pixels]
+    flags              Bitwise or of the quality flags              uint8 vector [n_pixels]
+
+    """
+
+    def __init__(self, wavelengths, phase_variances, alpha=0.01, amplitude_threshold=0.05, dtype='float64'):
+
+        """
+            1. Definitions and imports ---------------------------------------
+        """
+
+
+        # i) Import numerical libraries
+
+        import numpy as np
+        from scipy.special import chdtri
+        import Ambiguity_resolution as AR
+
+
+        # ii) Quantities shared by all batches
+
+        self.n_obs=len(wavelengths)
+        self.dtype=np.dtype(dtype)
+        self.complex_dtype=np.result_type(self.dtype,np.complex64)
+
+        self.lambda_vec_pinv=AR.Pseudo_reciprocal(wavelengths).astype(self.dtype)
+        self.phase_weights=AR.Pseudo_reciprocal(np.sqrt(phase_variances)).astype(self.dtype)
+
+        self.chi2_threshold=float(chdtri(self.n_obs-1,alpha))
+        self.amplitude_threshold=amplitude_threshold
+
+
+    def allocate(self, n_pixels):
+
+        # Buffers for the outputs and the work space of n_pixels pixels
+
+        import numpy as np
+
+        shape=(n_pixels,self.n_obs)
+        out={'r' : np.empty(shape,dtype=self.dtype), 'r_wrapped' : np.empty(shape,dtype=self.dtype),
+             'phasors' : np.empty(shape,dtype=self.complex_dtype),
+             'l1' : np.empty([n_pixels],dtype=self.dtype), 'l2' : np.empty([n_pixels],dtype=self.dtype),
+             'chi2' : np.empty([n_pixels],dtype=self.dtype), 'amplitude_cv' : np.empty([n_pixels],dtype=self.dtype),
+             'flags' : np.empty([n_pixels],dtype=np.uint8),
+             '_work' : np.empty(shape,dtype=self.dtype), '_work_pixels' : np.empty([n_pixels],dtype=self.dtype),
+             '_mask' : np.empty([n_pixels],dtype=bool)}
+
+        return out
+
+
+    def compute(self, d, N, observations, out=None):
+
+        """
+            2. Residuals and wrapped residuals -------------------------------
+        """
+
+
+        # i) Import libraries and check buffers
+
+        import numpy as np
+        import Ambiguity_resolution as AR
+
+        observations=np.atleast_2d(observations)
+        n_pixels=observations.shape[0]
+
+        if out is None:
+            out=self.allocate(n_pixels)
+        elif out['r'].shape!=(n_pixels,self.n_obs):
+            raise ValueError('Buffers of shape {} do not fit {} pixels with {} observations'.format(out['r'].shape,n_pixels,self.n_obs))
+
+        r=out['r']
+        r_wrapped=out['r_wrapped']
+        work=out['_work']
+        work_pixels=out['_work_pixels']
+        mask=out['_mask']
+        flags=out['flags']
+
+
+        # ii) Observed phases are written to r_wrapped as intermediate storage
+
+        np.arctan2(observations.imag,observations.real,out=r_wrapped)
+        AR.Residuals_batch(d, N, r_wrapped, self.lambda_vec_pinv, out=r)
+
+
+        # iii) Wrap by subtracting the nearest multiple of 2pi
+
+        np.divide(r,2*np.pi,out=r_wrapped)
+        np.rint(r_wrapped,out=r_wrapped)
+        r_wrapped*=-2*np.pi
+        r_wrapped+=r
+
+
+
+        """
+            3. Norms and phasors ---------------------------------------------
+        """
+
+
+        # i) Weighted l1 norm
+
+        np.abs(r_wrapped,out=work)
+        work*=self.phase_weights
+        np.sum(work,axis=1,out=out['l1'])
+
+
+        # ii) Weighted l2 norm and chi2 statistic
+
+        np.multiply(r_wrapped,self.phase_weights,out=work)
+        np.square(work,out=work)
+        np.sum(work,axis=1,out=out['chi2'])
+        np.sqrt(out['chi2'],out=out['l2'])
+
+
+        # iii) Complex residuals, cos and sin of the wrapped residuals are
+        # written directly into the real and imaginary parts
+
+        np.cos(r_wrapped,out=out['phasors'].real)
+        np.sin(r_wrapped,out=out['phasors'].imag)
+
+
+        # iv) Coefficient of variation of the amplitudes in two passes
+
+        amplitude_cv=out['amplitude_cv']
+        np.abs(observations,out=work)
+        np.mean(work,axis=1,out=work_pixels)
+        work-=work_pixels[:,np.newaxis]
+        np.square(work,out=work)
+        np.mean(work,axis=1,out=amplitude_cv)
+        np.sqrt(amplitude_cv,out=amplitude_cv)
+        amplitude_cv/=work_pixels
+
+
+
+        """
+            4. Quality flags -------------------------------------------------
+        """
+
+
+        # i) Tests of Detect_mixed_pixels
+
+        flags[:]=0
+        np.greater(out['chi2'],self.chi2_threshold,out=mask)
+        np.bitwise_or(flags,FLAG_RESIDUAL,out=flags,where=mask)
+        np.greater(amplitude_cv,self.amplitude_threshold,out=mask)
+        np.bitwise_or(flags,FLAG_AMPLITUDE,out=flags,where=mask)
+
+
+        # ii) Residuals beyond pi indicate wavecycles inconsistent with d
+
+        np.abs(r,out=work)
+        np.max(work,axis=1,out=work_pixels)
+        np.greater(work_pixels,np.pi,out=mask)
+        np.bitwise_or(flags,FLAG_WRAP,out=flags,where=mask)
+
+
+        # iii) Non-finite distances or residuals, the residuals of a pixel with
+        # non-finite d are not finite and neither is the maximum of their
+        # absolute values
+
+        np.isfinite(work_pixels,out=mask)
+        np.logical_not(mask,out=mask)
+        np.bitwise_or(flags,FLAG_NONFINITE,out=flags,where=mask)
+
+        return out
+
+
+
+
+
+
+
+def Compute_diagnostics(d, N, observations, wavelengths, phase_variances, alpha=0.01, amplitude_threshold=0.05, dtype='float64', out=None):
+    """
+    The goal of this function is to compute the diagnostics of Residual_
+    diagnostics for one batch of pixels, e.g. the results of Ambiguity_
+    resolution_batch. For repeated frames, a Residual_diagnostics object and
+    its buffers should be set up once and reused instead.
+
+    Name                 Interpretation                             Type
+    d                   The estimated distances                     vector [n_pixels]
+    N                   The estimated full wavecycles               matrix [n_pixels,n_obs]
+    observations        Observations in the form of complex         c-matrix [n_pixels,n_obs]
+                        numbers, one row per pixel
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    alpha, amplitude_   Thresholds and data type, see Residual_     see Residual_diagnostics
+    threshold, dtype    diagnostics
+    out                 Optional buffers returned by Residual_      dictionary
+                        diagnostics.allocate
+    diagnostics         The diagnostics, see Residual_diagnostics   dictionary
+
+    """
+
+    diagnostics=Residual_diagnostics(wavelengths, phase_variances, alpha, amplitude_threshold, dtype)
+
+    return diagnostics.compute(d, N, observations, out)
@@ -0,0 +1,222 @@
+"""
+This file provides a reader/writer layer for resolving ambiguities of large
+files of raw complex observations that do not fit into memory. Observations
+are stored row by row as raw complex64 or complex128 numbers of shape
+[n_pixels, n_obs] without header; results are written to memory-mapped .npy
+files. Pixels are processed in chunks of bounded size so that the memory used
+does not depend on the size of the file.
+The functions are:
+    Write_observations: Appends observations to a raw observation file
+    Open_observations: Memory-maps a raw observation file
+    Create_result_files: Creates memory-mapped output arrays for d, N and r
+    Resolve_file: Resolves all pixels of a raw observation file chunk by chunk
+"""
+
+
+
+
+def Write_observations(path, observations, dtype='complex64', append=True):
+    """
+    The goal of this function is to write a matrix of complex observations to
+    a raw observation file. By default the observations are appended so that
+    large files can be written chunk by chunk.
+
+    Name                 Interpretation                             Type
+    path                Path of the raw observation file            string
+    observations        Observations, one row per pixel             c-matrix [n_pixels,n_obs]
+    dtype               Data type stored in the file                'complex64' or
+                                                                    'complex128'
+    append              Append to an existing file if True          boolean
+
+    """
+
+    import numpy as np
+
+    with open(path,'ab' if append else 'wb') as file:
+        np.ascontiguousarray(observations,dtype=dtype).tofile(file)
+
+
+
+
+
+
+
+def Open_observations(path, n_obs, dtype='complex64', mode='r'):
+    """
+    The goal of this function is to memory-map a raw observation file as a
+    matrix with one row per pixel. The number of pixels follows from the size
+    of the file. As numpy cannot memory-map an empty file, an empty file is
+    returned as an empty array with n_obs columns.
+
+    Name                 Interpretation                             Type
+    path                Path of the raw observation file            string
+    n_obs               Number of observations per pixel            positive integer
+    dtype               Data type stored in the file                'complex64' or
+                                                                    'complex128'
+    mode                Mode of numpy.memmap, e.g. 'r' or 'r+'      string
+    observations        The memory-mapped observations              c-memmap [n_pixels,n_obs]
+
+    """
+
+    import os
+    import numpy as np
+
+    n_bytes_pixel=n_obs*np.dtype(dtype).itemsize
+    n_bytes=os.path.getsize(path)
+
+    if n_bytes%n_bytes_pixel!=0:
+        raise ValueError('Size of {} is not a multiple of {} observations of type {}'.format(path,n_obs,dtype))
+
+    if n_bytes==0:
+        return np.zeros((0,n_obs), dtype=dtype)
+
+    return np.memmap(path, dtype=dtype, mode=mode, shape=(n_bytes//n_bytes_pixel,n_obs))
+
+
+
+
+
+
+
+def Create_result_files(path_prefix, n_pixels, n_obs, dtype='float64'):
+    """
+    The goal of this function is to create memory-mapped .npy files for the
+    estimated distances, wavecycles and residuals of n_pixels pixels. The files
+    are named path_prefix+'_d.npy', path_prefix+'_N.npy' and path_prefix+
+    '_r.npy' and can be read back with numpy.load(..., mmap_mode='r'). The
+    data type applies to N and r; d is always stored in double precision as
+    its share of the size is small and its precision limits that of the
+    distances.
+
+    Name                 Interpretation                             Type
+    path_prefix         Common prefix of the paths of the files     string
+    n_pixels            Number of pixels                            positive integer
+    n_obs               Number of observations per pixel            positive integer
+    dtype               Data type of N and r, 'float64' or          string
+                        'float32'
+    d, N, r             The memory-mapped results                   memmaps [n_pixels],
+                                                                    [n_pixels,n_obs],
+                                                                    [n_pixels,n_obs]
+
+    """
+
+    from numpy.lib.format import open_memmap
+
+    d=open_memmap(path_prefix+'_d.npy', mode='w+', dtype='float64', shape=(n_pixels,))
+    N=open_memmap(path_prefix+'_N.npy', mode='w+', dtype=dtype, shape=(n_pixels,n_obs))
+    r=open_memmap(path_prefix+'_r.npy', mode='w+', dtype=dtype, shape=(n_pixels,n_obs))
+
+    return d, N, r
+
+
+
+
+
+
+
+def Resolve_file(path_observations, path_prefix, wavelengths, phase_variances, optim_opts, dtype='complex64', chunk_size=4096):
+    """
+    The goal of this function is to resolve the ambiguities of all pixels in a
+    raw observation file without loading it into memory. The file is memory-
+    mapped and processed in chunks of chunk_size pixels by Ambiguity_resolution_
+    batch with one resolver shared by all chunks. The results of each chunk are
+    written to memory-mapped output files and flushed to disk before the next
+    chunk is processed so that the memory used is bounded by the chunk size.
+    If the entry "dtype" of optim_opts is 'float32', N and r are computed and
+    stored in single precision. An empty observation file yields empty result
+    files.
+
+    For this, do the following:
+        1. Imports and definitions
+        2. Resolve chunk by chunk
+        3. Finalize results
+
+    INPUTS
+    The inputs consist in the paths of the input and output files, the
+    quantities needed by Ambiguity_resolution_batch and the chunk size.
+
+    Name                 Interpretation                             Type
+    path_observations   Path of the raw observation file            string
+    path_prefix         Common prefix of the result files, see      string
+                        Create_result_files
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    dtype               Data type stored in the observation file    'complex64' or
+                                                                    'complex128'
+    chunk_size          Number of pixels processed at once          positive integer
+
+
+    OUTPUTS
+    The outputs consist in the memory-mapped results opened for reading.
+
+    Name                 Interpretation                             Type
+    d, N, r             The estimated distances, wavecycles and     memmaps [n_pixels],
+                        residuals                                   [n_pixels,n_obs],
+                                                                    [n_pixels,n_obs]
+
+
+    """
+
+
+
+    """
+        1. Imports and definitions -------------------------------------------
+    """
+
+
+    # i) Import packages
+
+    import numpy as np
+    import Ambiguity_resolution as AR
+
+
+    # ii) Inputs, outputs and shared resolver
+
+    n_obs=len(wavelengths)
+    observations=Open_observations(path_observations, n_obs, dtype)
+    n_pixels=observations.shape[0]
+
+    d,N,r=Create_result_files(path_prefix, n_pixels, n_obs, optim_opts.get('dtype','float64'))
+    resolver=AR.Setup_resolver(wavelengths, phase_variances, optim_opts)
+
+
+
+    """
+        2. Resolve chunk by chunk --------------------------------------------
+    """
+
+
+    # i) Read chunk, resolve and write results
+
+    for k in range(0,n_pixels,chunk_size):
+        chunk=np.asarray(observations[k:k+chunk_size,:])
+        d_chunk,N_chunk,r_chunk=AR.Ambiguity_resolution_batch(chunk, wavelengths, phase_variances, optim_opts, resolver=resolver)
+
+        d[k:k+chunk_size]=d_chunk
+        N[k:k+chunk_size,:]=N_chunk
+        r[k:k+chunk_size,:]=r_chunk
+
+        d.flush()
+        N.flush()
+        r.flush()
+
+
+
+    """
+        3. Finalize results --------------------------------------------------
+    """
+
+
+    # i) Close writable maps and reopen for reading
+
+    del d, N, r, observations
+
+    d=np.load(path_prefix+'_d.npy', mmap_mode='r')
+    N=np.load(path_prefix+'_N.npy', mmap_mode='r')
+    r=np.load(path_prefix+'_r.npy', mmap_mode='r')
+
+
+    return d, N, r
@@ -42,54 +42,39 @@ d_sample_1=np.linspace(0,2*d_true[0],n_disc)
 """
 
 
-# i) Define objective function
+# i) Define objective function, evaluated for all sample points at once
 
 z_true,_=sf.Generate_data(weights, d_true,wavelengths)
 
 def obj_fun(wavelengths,d_est):
     
-    z_est,_=sf.Generate_data(weights,[d_est],wavelengths)
-    phi_temp=np.angle(z_est)
-    phase_resid=phi_temp-np.angle(z_true)
-    resid_norm=np.linalg.norm(phase_resid,1)
+    resid_norm=sf.Objective_sweep(z_true,d_est,wavelengths,wrap=False)
     
     return resid_norm/n_obs
 
 
 # ii) Evaluate objective function at sample points 1
 
-obj_sample_1=np.zeros([n_disc])
-
-for k in range(n_disc):
-    obj_sample_1[k]=obj_fun(wavelengths,d_sample_1[k])
+obj_sample_1=obj_fun(wavelengths,d_sample_1)
    
     
 # iii) Evaluate objective function at sample points 2
 
 d_sample_2=np.linspace(1.8,2,n_disc)
-obj_sample_2=np.zeros([n_disc])
-
-for k in range(n_disc):
-    obj_sample_2[k]=obj_fun(wavelengths,d_sample_2[k])
+obj_sample_2=obj_fun(wavelengths,d_sample_2)
     
     
     
 # iv) Evaluate objective function at sample points 3
 
 d_sample_3=np.linspace(0.9,1.1,n_disc)
-obj_sample_3=np.zeros([n_disc])
-
-for k in range(n_disc):
-    obj_sample_3[k]=obj_fun(wavelengths,d_sample_3[k])
+obj_sample_3=obj_fun(wavelengths,d_sample_3)
 
 
 # v) Evaluate objective function at sample points 4
 
 d_sample_4=np.linspace(0.99,1.01,n_disc)
-obj_sample_4=np.zeros([n_disc])
-
-for k in range(n_disc):
-    obj_sample_4[k]=obj_fun(wavelengths,d_sample_4[k])
+obj_sample_4=obj_fun(wavelengths,d_sample_4)
 
 
 
@@ -0,0 +1,330 @@
+"""
+This file provides a precomputed lookup index for ambiguity resolution with a
+fixed set of wavelengths and a bounded range of distances. For noise-free
+observations of a single surface, the phases phi_i(d)=4*pi*d/lambda_i mod 2*pi
+trace a curve on the torus [0,2*pi)^n_obs; its points (cos phi_i, sin phi_i)
+are sampled densely in d and stored in a KD-tree. Observed phases are mapped
+to the torus the same way, the nearest samples yield candidate wavecycles N
+and a local refinement picks the l1 optimal distance among them.
+The functions and classes are:
+    Build_lookup_index: Precomputes the index for wavelengths and a range of d
+    Load_lookup_index: Loads an index saved to disk
+    Lookup_index: The index, can be saved to disk and queried
+    Lookup_resolver: Resolver answering Ambiguity_resolution via the index
+"""
+
+
+from Ambiguity_resolution import Base_resolver
+
+
+
+
+def Build_lookup_index(wavelengths, d_lower, d_upper, oversampling=8):
+    """
+    The goal of this function is to precompute the lookup index for a given
+    vector of wavelengths and a range [d_lower, d_upper] of distances. The
+    distances are sampled with spacing lambda_min/(2*oversampling) so that the
+    phase of the shortest wavelength advances by 2*pi/oversampling between
+    neighboring samples.
+
+    For this, do the following:
+        1. Imports and definitions
+        2. Sample the curve of phases
+        3. Build the KD-tree
+
+    INPUTS
+    The inputs consist in the wavelengths, the range of distances to be covered
+    and the sampling density.
+
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    Vector [n_obs]
+                        the measurements.
+    d_lower, d_upper    Range of distances covered by the index     real numbers
+    oversampling        Number of samples per half of the           positive integer
+                        shortest wavelength
+
+
+    OUTPUTS
+    The output is the lookup index.
+
+    Name                 Interpretation                             Type
+    index              The precomputed lookup index                 Lookup_index
+
+
+    """
+
+
+
+    """
+        1. Imports and definitions -------------------------------------------
+    """
+
+
+    # i) Import packages
+
+    import numpy as np
+    from scipy.spatial import cKDTree
+
+
+    # ii) Sampling of distances
+
+    wavelengths=np.asarray(wavelengths,dtype=float)
+    step=np.min(wavelengths)/(2*oversampling)
+    d_samples=np.linspace(d_lower,d_upper,int(np.ceil((d_upper-d_lower)/step))+1)
+
+
+
+    """
+        2. Sample the curve of phases ----------------------------------------
+    """
+
+
+    # i) Points on the torus embedded as [cos, sin]
+
+    points=_Torus_points(4*np.pi*d_samples[:,np.newaxis]/wavelengths[np.newaxis,:])
+
+
+
+    """
+        3. Build the KD-tree -------------------------------------------------
+    """
+
+
+    # i) Assemble index
+
+    tree=cKDTree(points)
+
+
+    return Lookup_index(wavelengths, d_lower, d_upper, d_samples, tree)
+
+
+
+
+
+
+
+def Load_lookup_index(path):
+    """
+    The goal of this function is to load a lookup index that has been saved to
+    disk with Lookup_index.save so that the phases need not be sampled again.
+    The file holds plain arrays only and is read without unpickling objects, 
+    so loading an index from an untrusted source cannot execute code; the 
+    KD-tree is rebuilt from the stored points.
+
+    Name                 Interpretation                             Type
+    path                Path of the saved index                     string
+    index               The lookup index                            Lookup_index
+
+    """
+
+    import numpy as np
+    from scipy.spatial import cKDTree
+
+    with np.load(path,allow_pickle=False) as data:
+        index=Lookup_index(data['wavelengths'], float(data['d_lower']), float(data['d_upper']),
+                           data['d_samples'], cKDTree(data['points']))
+
+    return index
+
+
+
+
+
+
+
+class Lookup_index:
+    """
+    The goal of this class is to store the KD-tree of sampled phase vectors
+    together with the sampled distances and the configuration they belong to.
+    Instances are created by Build_lookup_index and Load_lookup_index.
+
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths the index has been built for    Vector [n_obs]
+    d_lower, d_upper    Range of distances covered by the index     real numbers
+    d_samples           The sampled distances                       Vector [n_samples]
+    tree                KD-tree of the embedded phase vectors       cKDTree
+
+    """
+
+    def __init__(self, wavelengths, d_lower, d_upper, d_samples, tree):
+
+        self.wavelengths=wavelengths
+        self.d_lower=d_lower
+        self.d_upper=d_upper
+        self.d_samples=d_samples
+        self.tree=tree
+
+
+    def save(self, path):
+
+        # Plain arrays in the npz format without pickled objects, the KD-tree
+        # is rebuilt from its points when loading
+
+        import numpy as np
+
+        with open(path,'wb') as file:
+            np.savez(file, wavelengths=self.wavelengths, d_lower=self.d_lower, d_upper=self.d_upper,
+                     d_samples=self.d_samples, points=self.tree.data)
+
+
+    def query(self, phi_obs, k=2, span=4):
+
+        # Sampled distances nearest to the observed phases on the torus and
+        # their neighbors along the curve
+
+        import numpy as np
+
+        _,index=self.tree.query(_Torus_points(phi_obs),k=k)
+        index=np.atleast_1d(index)[:,np.newaxis]+np.arange(-span,span+1)[np.newaxis,:]
+        index=np.unique(np.clip(index,0,len(self.d_samples)-1))
+
+        return self.d_samples[index]
+
+
+
+
+
+
+
+class Lookup_resolver(Base_resolver):
+    """
+    The goal of this class is to solve the simple ambiguity resolution problem
+    by means of a lookup index. The k sampled distances nearest to the observed
+    phases and their neighbors along the curve of phases are the candidates;
+    for each of them the wavecycles N follow by rounding and the distance is
+    refined to the l1 optimum for these N. The
+    candidate with the smallest weighted l1 norm of residuals is returned. The
+    result coincides with the global optimum whenever the latter lies within
+    the cells of the candidates, which is the case for moderate noise.
+
+    For this, do the following:
+        1. Definitions and imports
+        2. Load or build the index
+    and on each call to solve(), see Ambiguity_resolution.Base_resolver:
+        3. Query candidates and refine locally
+
+    INPUTS
+    The inputs are the same as for the class Ambiguity_resolution.Ambiguity_
+    resolver. The entry "lookup_index" of optim_opts holds a Lookup_index or the
+    path of a saved one; if it is missing, the index is built for the bounds
+    compiled from optim_opts, which requires an upper bound on d. The optional
+    entries "lookup_k" (default 2) and "lookup_span" (default 4) set the number
+    of nearest samples and of neighbors on either side used as candidates.
+
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+
+
+    OUTPUTS
+    The method solve(observations) returns the same triple (d, N, r) as the
+    function Ambiguity_resolution. The statistics of the last solve, see 
+    Ambiguity_resolution.Base_resolver, have the status 'heuristic'.
+
+    """
+
+    def __init__(self, wavelengths, phase_variances, optim_opts):
+
+        """
+            1. Definitions and imports ---------------------------------------
+        """
+
+
+        # i) Import numerical libraries
+
+        import numpy as np
+        import Ambiguity_resolution as AR
+
+
+        # ii) Extract quantities
+
+        self.n_obs=len(wavelengths)
+        self.k=optim_opts.get('lookup_k',2)
+        self.span=optim_opts.get('lookup_span',4)
+        self.callback=optim_opts.get('callback')
+        d_lower,d_upper,N_lower,N_upper,_=AR.Compile_bounds(optim_opts, self.n_obs, strict=True)
+        self.d_lower=d_lower
+        self.d_upper=d_upper
+        self.N_lower=N_lower
+        self.N_upper=N_upper
+
+        self.wavelengths=np.asarray(wavelengths,dtype=float)
+        self.lambda_vec_pinv=AR.Pseudo_reciprocal(wavelengths)
+        self.phase_weights=AR.Pseudo_reciprocal(np.sqrt(phase_variances))
+
+
+
+        """
+            2. Load or build the index ---------------------------------------
+        """
+
+
+        # i) Index from options or built for the bounds
+
+        index=optim_opts.get('lookup_index')
+
+        if index is None:
+            if not np.isfinite(d_upper):
+                raise ValueError('Building a lookup index requires an upper bound on d_opt')
+            index=Build_lookup_index(wavelengths, d_lower, d_upper)
+        elif isinstance(index,str):
+            index=Load_lookup_index(index)
+
+        if len(index.wavelengths)!=self.n_obs or not np.allclose(index.wavelengths,self.wavelengths):
+            raise ValueError('The lookup index has been built for different wavelengths')
+        if index.d_lower>d_lower or index.d_upper<d_upper:
+            raise ValueError('The lookup index does not cover the bounds [{}, {}] of d_opt'.format(d_lower,d_upper))
+
+        self.index=index
+
+
+    def _solve_phases(self, phi_obs):
+
+        """
+            3. Query candidates and refine locally ---------------------------
+        """
+
+
+        # i) Wavecycles of the candidates by rounding
+
+        import numpy as np
+        import Ambiguity_resolution as AR
+
+        d_cand=self.index.query(phi_obs,self.k,self.span)
+        phi_frac=phi_obs/(2*np.pi)
+        N_cand=np.clip(np.round(2*d_cand[:,np.newaxis]*self.lambda_vec_pinv-phi_frac),self.N_lower,self.N_upper)
+
+        # ii) l1 optimal distance for each candidate
+
+        d_opt=AR.Optimal_distance(N_cand, phi_obs, self.wavelengths, self.phase_weights, self.d_lower, self.d_upper)
+
+        # iii) Best candidate
+
+        objective=np.abs(2*np.pi*(2*d_opt[:,np.newaxis]*self.lambda_vec_pinv-N_cand)-phi_obs)@self.phase_weights
+        k_best=np.argmin(objective)
+
+        return d_opt[k_best], N_cand[k_best,:]
+
+
+    def _solve_info(self):
+
+        # Optimal among the candidates, global optimality is not certified
+
+        return {'status' : 'heuristic'}
+
+
+
+
+
+
+
+def _Torus_points(phases):
+
+    # Embedding of phases on the torus as [cos, sin]
+
+    import numpy as np
+
+    return np.concatenate((np.cos(phases),np.sin(phases)),axis=-1)
@@ -1,6 +1,7 @@
 """
 The goal of this script is to illustrate the ambiguity resolution function and
-demonstrate its preformance when the observations originate from a mixed pixel
+demonstrate its preformance when the observations originate from a mixed pixel.
+The mixed pixel resolver of Mixed_pixel_AR estimates both surfaces instead.
 For this, do the following:
     1. Definitions and imports
     2. Simulate data
@@ -21,6 +22,7 @@ For this, do the following:
 import Support_funs_AR as sf
 import numpy as np
 import Ambiguity_resolution as AR
+import Mixed_pixel_AR as mp
 import time
 
 import matplotlib.pyplot as plt
@@ -65,6 +67,14 @@ d,N,r=AR.Ambiguity_resolution(observations, wavelengths, phase_variances,optim_o
 d_noise,N_noise,r_noise=AR.Ambiguity_resolution(observations, wavelengths, phase_variances,optim_opts)
 
 
+# ii) Solve the mixed pixel problem for two surfaces
+
+optim_opts_mp=dict(optim_opts, n_surfaces=2)
+
+d_mp,weights_mp,r_mp=mp.Mixed_pixel_resolution(observations, wavelengths, phase_variances,optim_opts_mp)
+d_mp_noise,weights_mp_noise,_=mp.Mixed_pixel_resolution(observations_noisy, wavelengths, phase_variances,optim_opts_mp)
+
+
 
 """
     4. Compare results and ground truth ---------------------------------------
@@ -79,6 +89,8 @@ time.sleep(0.1)
 print(' The ground truth distances are d = {}'.format(distances))
 print(' The estimated distance is d = {}'.format(d))
 print(' The noisily estimated distance is d = {}'.format(d_noise))
+print(' The mixed pixel resolver estimates d = {} with weights {}'.format(d_mp,weights_mp))
+print(' From noisy data it estimates d = {} with weights {}'.format(d_mp_noise,weights_mp_noise))
 
 
 # ii) Calculate complex residuals (no noise, noise, arbitrary distance)
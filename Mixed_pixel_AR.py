@@ -0,0 +1,466 @@
+"""
+This file provides functions for resolving mixed pixels, i.e. observations that
+are the superposition of the waves backscattered by K surfaces in different
+distances. Distances and weights of all surfaces are estimated jointly by
+sparse recovery over a dictionary of single surface observations followed by a
+local refinement. All computations are vectorized over batches of pixels.
+The functions and classes are:
+    Mixed_pixel_resolution: Estimates distances and weights for one pixel
+    Mixed_pixel_resolution_batch: Estimates distances and weights for a batch
+        of pixels sharing one wavelength set
+    Mixed_pixel_resolver: Resolver holding the dictionary for one configuration
+    Detect_mixed_pixels: Flags mixed pixels by cheap tests on residuals and
+        amplitudes
+    Detect_and_resolve_batch: Resolves a batch of pixels as single surfaces and
+        unmixes only the flagged ones
+"""
+
+
+
+
+def Mixed_pixel_resolution(observations, wavelengths, phase_variances, optim_opts):
+    """
+    The goal of this function is to estimate the distances and weights of the K
+    surfaces S_1, ... , S_K whose backscattered waves superpose to the observed
+    complex numbers. It is the counterpart of Ambiguity_resolution.Ambiguity_
+    resolution for mixed pixels; see Mixed_pixel_resolver for the method.
+
+    INPUTS
+    The inputs are the same as for the function Ambiguity_resolution. The
+    entry "n_surfaces" of optim_opts sets the number K of surfaces (default 2).
+
+    Name                 Interpretation                             Type
+    observations        Observations in the form of complex         c-vector [n_obs]
+                        numbers
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+
+
+    OUTPUTS
+    The outputs consist in the estimated distances and weights sorted by
+    distance and the complex residuals.
+
+    Name                 Interpretation                             Type
+    d                  The estimated distances                      vector [K]
+    weights            The estimated weights                        vector [K]
+    r                  The complex residuals                        c-vector [n_obs]
+
+    """
+
+    resolver=Mixed_pixel_resolver(wavelengths, phase_variances, optim_opts)
+
+    return resolver.solve(observations)
+
+
+
+
+
+
+
+def Mixed_pixel_resolution_batch(observations, wavelengths, phase_variances, optim_opts, resolver=None):
+    """
+    The goal of this function is to estimate the distances and weights of the K
+    surfaces for a batch of n_pixels mixed pixels that have all been measured
+    with the same sequence of wavelengths. The dictionary is built once and
+    shared by all pixels, which are processed in vectorized chunks.
+
+    INPUTS
+    The inputs are the same as for the function Mixed_pixel_resolution except
+    for the observations which are now stacked into a matrix with one row per
+    pixel. Optionally, an already constructed resolver for the same
+    configuration can be passed.
+
+    Name                 Interpretation                             Type
+    observations        Observations in the form of complex         c-matrix [n_pixels,n_obs]
+                        numbers, one row per pixel
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    resolver            Optional resolver built for the same        Mixed_pixel_resolver
+                        configuration
+
+
+    OUTPUTS
+    The outputs consist in the estimated distances, weights and residuals of
+    all pixels.
+
+    Name                 Interpretation                             Type
+    d                  The estimated distances                      matrix [n_pixels,K]
+    weights            The estimated weights                        matrix [n_pixels,K]
+    r                  The complex residuals                        c-matrix [n_pixels,n_obs]
+
+    """
+
+    if resolver is None:
+        resolver=Mixed_pixel_resolver(wavelengths, phase_variances, optim_opts)
+
+    return resolver.solve_batch(observations)
+
+
+
+
+
+
+
+def Detect_mixed_pixels(observations, phase_variances, residuals=None, alpha=0.01, amplitude_threshold=0.05):
+    """
+    The goal of this function is to flag mixed pixels with two cheap tests that
+    are vectorized over all pixels. For a single surface, the residuals r of 
+    Ambiguity_resolution are phase noise; for a mixed pixel, the phases of the
+    superposition are not those of any single distance and the wrapped 
+    residuals spread out towards an equidistribution on [-pi,pi], see 
+    Illustrate_residual_distribution.py. Their sum of squares weighted by the 
+    inverse phase variances is compared to the 1-alpha quantile of the chi2
+    distribution with n_obs-1 degrees of freedom. Independently of any solve,
+    the amplitudes of single surface observations are constant across 
+    wavelengths while those of a superposition a_1+a_2*exp(i*theta_i) vary 
+    with the wavelength unless the distances are in rational dependence with
+    all wavelengths; their coefficient of variation is compared to 
+    amplitude_threshold. A pixel is flagged if either test rejects.
+
+    INPUTS
+    The inputs consist in the observations, the phase variances, optionally the
+    residuals returned by Ambiguity_resolution_batch and the thresholds.
+
+    Name                 Interpretation                             Type
+    observations        Observations in the form of complex         c-matrix [n_pixels,n_obs]
+                        numbers, one row per pixel
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    residuals           Residuals of single surface ambiguity       matrix [n_pixels,n_obs]
+                        resolution, None to test amplitudes only    or None
+    alpha               False alarm rate of the residual test       number in (0,1)
+    amplitude_threshold Maximum coefficient of variation of the     positive number
+                        amplitudes of a single surface
+
+
+    OUTPUTS
+    The outputs consist in the flags and the test statistics of all pixels.
+
+    Name                 Interpretation                             Type
+    flags              True for pixels detected as mixed            bool vector [n_pixels]
+    chi2_stat          Weighted sum of squared wrapped residuals,   vector [n_pixels]
+                       nan if no residuals are given
+    amplitude_cv       Coefficient of variation of amplitudes       vector [n_pixels]
+
+    """
+
+    import numpy as np
+    from scipy.special import chdtri
+
+    observations=np.atleast_2d(observations)
+    n_obs=observations.shape[1]
+
+    # Amplitude test on the raw observations
+
+    amplitudes=np.abs(observations)
+    amplitude_cv=np.std(amplitudes,axis=1)/np.mean(amplitudes,axis=1)
+    flags=amplitude_cv>amplitude_threshold
+
+    # Residual test on the wrapped residuals
+
+    if residuals is None:
+        chi2_stat=np.full([observations.shape[0]],np.nan)
+    else:
+        residuals_wrapped=np.angle(np.exp(1j*np.atleast_2d(residuals)))
+        chi2_stat=np.sum(residuals_wrapped**2/np.asarray(phase_variances),axis=1)
+        flags=flags|(chi2_stat>chdtri(n_obs-1,alpha))
+
+    return flags, chi2_stat, amplitude_cv
+
+
+
+
+
+
+
+def Detect_and_resolve_batch(observations, wavelengths, phase_variances, optim_opts, resolver=None, mp_resolver=None, alpha=0.01, amplitude_threshold=0.05):
+    """
+    The goal of this function is to resolve a batch of pixels under the single
+    surface assumption, to flag mixed pixels by Detect_mixed_pixels and to pass
+    only the flagged pixels on to the more expensive mixed pixel resolver.
+
+    INPUTS
+    The inputs are those of Ambiguity_resolution.Ambiguity_resolution_batch and
+    of Detect_mixed_pixels; optionally, resolvers already built for the same
+    configuration can be passed for both steps.
+
+    Name                 Interpretation                             Type
+    observations        Observations in the form of complex         c-matrix [n_pixels,n_obs]
+                        numbers, one row per pixel
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    resolver            Optional resolver of Ambiguity_resolution   resolver object
+    mp_resolver         Optional mixed pixel resolver               Mixed_pixel_resolver
+    alpha               False alarm rate of the residual test       number in (0,1)
+    amplitude_threshold Maximum coefficient of variation of the     positive number
+                        amplitudes of a single surface
+
+
+    OUTPUTS
+    The outputs consist in the single surface results of all pixels, the flags
+    and the mixed pixel results, which are nan for pixels not flagged.
+
+    Name                 Interpretation                             Type
+    d, N, r            Single surface results, see                  [n_pixels],
+                       Ambiguity_resolution_batch                   [n_pixels,n_obs],
+                                                                    [n_pixels,n_obs]
+    flags              True for pixels detected as mixed            bool vector [n_pixels]
+    d_mixed            Distances of the surfaces of mixed pixels    matrix [n_pixels,K]
+    weights_mixed      Weights of the surfaces of mixed pixels      matrix [n_pixels,K]
+
+    """
+
+    import numpy as np
+    import Ambiguity_resolution as AR
+
+    observations=np.atleast_2d(observations)
+
+    # Single surface resolution and detection for all pixels
+
+    d,N,r=AR.Ambiguity_resolution_batch(observations, wavelengths, phase_variances, optim_opts, resolver=resolver)
+    flags,_,_=Detect_mixed_pixels(observations, phase_variances, r, alpha, amplitude_threshold)
+
+    # Unmixing of the flagged pixels only
+
+    if mp_resolver is None:
+        mp_resolver=Mixed_pixel_resolver(wavelengths, phase_variances, optim_opts)
+
+    d_mixed=np.full([observations.shape[0],mp_resolver.n_surfaces],np.nan)
+    weights_mixed=np.full([observations.shape[0],mp_resolver.n_surfaces],np.nan)
+
+    if np.any(flags):
+        d_mixed[flags,:],weights_mixed[flags,:],_=mp_resolver.solve_batch(observations[flags,:])
+
+    return d, N, r, flags, d_mixed, weights_mixed
+
+
+
+
+
+
+
+class Mixed_pixel_resolver:
+    """
+    The goal of this class is to estimate the distances d_1, ... , d_K and the
+    nonnegative weights a_1, ... , a_K of K surfaces from the superposition
+    z_i = sum_k a_k exp(i*4*pi*d_k/lambda_i) of their backscattered waves. The
+    misfit is the l2 norm of the complex residuals weighted by the inverse
+    phase standard deviations. The dictionary of single surface observations
+    for a grid of distances with spacing lambda_min/(2*oversampling) is built
+    with Support_funs_AR.Generate_data_batch. Surfaces are then found by
+    matching pursuit: The atom correlating best with the current residual is
+    added, all distances and weights found so far are refined jointly by damped
+    Gauss-Newton steps and the residual is updated, K times in total.
+
+    For this, do the following:
+        1. Definitions and imports
+        2. Build the dictionary
+    and on each call to solve_batch():
+        3. Matching pursuit with refinement
+        4. Assemble results
+
+    INPUTS
+    The inputs are the same as for the class Ambiguity_resolution.Ambiguity_
+    resolver. The bounds on d are compiled from optim_opts by Compile_bounds; an
+    upper bound on d is required. The optional entries "n_surfaces" (default
+    2), "mp_oversampling" (default 4), "mp_iterations" (default 10) and
+    "chunk_size" (default chosen to keep 2^22 correlations in memory) of
+    optim_opts set the number of surfaces, the density of the dictionary, the
+    number of Gauss-Newton steps per refinement and the number of pixels
+    processed at once.
+
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+
+
+    OUTPUTS
+    The method solve(observations) returns the triple (d, weights, r) of the
+    function Mixed_pixel_resolution, the method solve_batch(observations) the
+    one of Mixed_pixel_resolution_batch.
+
+    """
+
+    def __init__(self, wavelengths, phase_variances, optim_opts):
+
+        """
+            1. Definitions and imports ---------------------------------------
+        """
+
+
+        # i) Import numerical libraries
+
+        import numpy as np
+        import Ambiguity_resolution as AR
+        import Support_funs_AR as sf
+
+
+        # ii) Extract quantities
+
+        self.n_obs=len(wavelengths)
+        self.n_surfaces=optim_opts.get('n_surfaces',2)
+        self.n_iterations=optim_opts.get('mp_iterations',10)
+        oversampling=optim_opts.get('mp_oversampling',4)
+        d_lower,d_upper,_,_,_=AR.Compile_bounds(optim_opts, self.n_obs, strict=True)
+
+        if not np.isfinite(d_upper):
+            raise ValueError('Mixed pixel resolution requires an upper bound on d_opt, e.g. constraints=[\'d_opt<=20\']')
+
+        self.d_lower=d_lower
+        self.d_upper=d_upper
+
+        self.wavelengths=np.asarray(wavelengths,dtype=float)
+        self.lambda_vec_pinv=AR.Pseudo_reciprocal(wavelengths)
+        self.phase_weights=AR.Pseudo_reciprocal(np.sqrt(phase_variances))
+
+
+
+        """
+            2. Build the dictionary ------------------------------------------
+        """
+
+
+        # i) Weighted single surface observations for a grid of distances
+
+        step=np.min(self.wavelengths)/(2*oversampling)
+        self.d_grid=np.linspace(d_lower,d_upper,int(np.ceil((d_upper-d_lower)/step))+1)
+        atoms=sf.Generate_data_batch(np.ones([1]),self.d_grid[:,np.newaxis],self.wavelengths)
+        self.atoms_conj=np.conj(atoms*self.phase_weights).T
+        self.atom_norm=np.sum(self.phase_weights**2)
+
+
+        # ii) Gauss-Newton steps in d are limited to one grid spacing, pixels
+        # per chunk
+
+        self.step_max=step
+        self.chunk_size=optim_opts.get('chunk_size',max(1,2**22//len(self.d_grid)))
+
+
+    def solve(self, observations):
+
+        d,weights,r=self.solve_batch(observations)
+
+        return d[0,:], weights[0,:], r[0,:]
+
+
+    def solve_batch(self, observations):
+
+        """
+            3. Matching pursuit with refinement ------------------------------
+        """
+
+
+        # i) Import numerical libraries
+
+        import numpy as np
+
+
+        # ii) Weighted observations, solve chunk by chunk
+
+        observations=np.atleast_2d(observations)
+        n_pixels=observations.shape[0]
+        d=np.zeros([n_pixels,self.n_surfaces])
+        weights=np.zeros([n_pixels,self.n_surfaces])
+
+        for k in range(0,n_pixels,self.chunk_size):
+            d[k:k+self.chunk_size,:],weights[k:k+self.chunk_size,:]=self._solve_chunk(observations[k:k+self.chunk_size,:]*self.phase_weights)
+
+
+
+        """
+            4. Assemble results ----------------------------------------------
+        """
+
+
+        # i) Sort surfaces by distance, complex residuals
+
+        order=np.argsort(d,axis=1)
+        d=np.take_along_axis(d,order,axis=1)
+        weights=np.take_along_axis(weights,order,axis=1)
+        r=observations-self._model(d,weights)
+
+        return d, weights, r
+
+
+    def _model(self, d, weights):
+
+        # Superposition of the surfaces for all pixels [n_pixels,n_obs]
+
+        import numpy as np
+
+        phasors=np.exp(1j*(4*np.pi*d[:,:,np.newaxis]*self.lambda_vec_pinv))
+
+        return np.sum(weights[:,:,np.newaxis]*phasors,axis=1)
+
+
+    def _solve_chunk(self, observations_w):
+
+        # Add the best correlating atom, refine all surfaces found so far
+
+        import numpy as np
+
+        n_pixels=observations_w.shape[0]
+        rows=np.arange(n_pixels)
+        d=np.zeros([n_pixels,self.n_surfaces])
+        weights=np.zeros([n_pixels,self.n_surfaces])
+        residuals=observations_w
+
+        for k in range(self.n_surfaces):
+            correlations=np.real(residuals@self.atoms_conj)
+            index=np.argmax(correlations,axis=1)
+            d[:,k]=self.d_grid[index]
+            weights[:,k]=np.maximum(correlations[rows,index]/self.atom_norm,0)
+
+            d[:,:k+1],weights[:,:k+1]=self._refine(observations_w,d[:,:k+1],weights[:,:k+1])
+            residuals=observations_w-self._model(d[:,:k+1],weights[:,:k+1])*self.phase_weights
+
+        return d, weights
+
+
+    def _refine(self, observations_w, d, weights):
+
+        # Damped Gauss-Newton steps on [d, weights], accepted where they decrease
+        # the weighted misfit
+
+        import numpy as np
+
+        n_surfaces=d.shape[1]
+        damping=0.001
+        cost=np.sum(np.abs(observations_w-self._model(d,weights)*self.phase_weights)**2,axis=1)
+
+        for _ in range(self.n_iterations):
+            phasors=np.exp(1j*(4*np.pi*d[:,:,np.newaxis]*self.lambda_vec_pinv))*self.phase_weights
+            residuals=observations_w-np.sum(weights[:,:,np.newaxis]*phasors,axis=1)
+
+            # Jacobian of the residuals, real and imaginary parts stacked
+
+            jacobian=np.concatenate((-1j*4*np.pi*self.lambda_vec_pinv*weights[:,:,np.newaxis]*phasors,-phasors),axis=1)
+            jacobian=np.concatenate((np.real(jacobian),np.imag(jacobian)),axis=2)
+            residuals=np.concatenate((np.real(residuals),np.imag(residuals)),axis=1)
+
+            normal=jacobian@np.transpose(jacobian,(0,2,1))
+            normal=normal+damping*normal*np.eye(2*n_surfaces)+1e-12*np.eye(2*n_surfaces)
+            delta=-np.linalg.solve(normal,(jacobian@residuals[:,:,np.newaxis]))[:,:,0]
+
+            d_new=np.clip(d+np.clip(delta[:,:n_surfaces],-self.step_max,self.step_max),self.d_lower,self.d_upper)
+            weights_new=np.maximum(weights+delta[:,n_surfaces:],0)
+            cost_new=np.sum(np.abs(observations_w-self._model(d_new,weights_new)*self.phase_weights)**2,axis=1)
+
+            accept=cost_new<cost
+            d[accept,:]=d_new[accept,:]
+            weights[accept,:]=weights_new[accept,:]
+            cost[accept]=cost_new[accept]
+
+        return d, weights
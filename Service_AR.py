@@ -0,0 +1,289 @@
+"""
+This file provides an asyncio interface for resolving ambiguities of pixels
+that arrive one at a time, e.g. from a socket. Individual requests are queued
+and collected into micro-batches that are dispatched to a thread or process
+executor as soon as either max_batch_size requests have been collected or the
+oldest request of the batch has waited for max_wait seconds. Producers await
+the result of their own pixel only and never wait for whole frames.
+The classes are:
+    Resolution_service: Micro-batching service resolving single pixels
+"""
+
+
+
+
+class Resolution_service:
+    """
+    The goal of this class is to accept single pixel requests from coroutines
+    and to resolve them in batches by Ambiguity_resolution_batch within a
+    latency budget. A background task collects requests from a queue into a
+    batch until max_batch_size requests are present or max_wait seconds have
+    passed since the first request of the batch arrived. The batch is handed
+    to the executor and the future of each request is resolved with its row of
+    the results. At most n_workers batches are in flight at once; while all
+    workers are busy, further requests accumulate in the queue so that batches
+    grow with the load.
+
+    For this, do the following:
+        1. Definitions and imports
+    and on start():
+        2. Start executor and batching task
+    and for each batch:
+        3. Collect requests
+        4. Dispatch batch and resolve futures
+
+    INPUTS
+    The inputs are the same as for the function Ambiguity_resolution_batch
+    complemented by the latency budget and the executor. With the executor
+    'thread', every thread builds its own resolver since resolvers are not
+    thread-safe. With the executor 'process', every worker process builds its
+    resolver once upon startup as in Ambiguity_resolution_parallel; the entry
+    "callback" of optim_opts is not passed on to the workers and scripts have
+    to protect the service by an if __name__=='__main__' clause.
+
+    Name                 Interpretation                             Type
+    wavelengths         Wavelengths of the waves used to perform    vector [n_obs]
+                        the measurements.
+    phase_variances     Phase variances of the noise added onto     vector [n_obs]
+                        the superposition of backscatter
+    optim_options       The options for optimization                dictionary
+    max_batch_size      Maximum number of pixels per batch          positive integer
+    max_wait            Maximum time in seconds the first request   nonnegative float
+                        of a batch waits for further requests
+    executor            Kind of executor, 'thread' or 'process'     string
+    n_workers           Number of threads or processes              positive integer
+
+
+    OUTPUTS
+    The coroutine resolve(observations) returns the triple (d, N, r) of the
+    function Ambiguity_resolution for one pixel or raises a ValueError if its
+    observations are not finite. The attributes n_requests and n_batches
+    count the resolved requests and dispatched batches.
+
+    """
+
+    def __init__(self, wavelengths, phase_variances, optim_opts, max_batch_size=64, max_wait=0.005, executor='thread', n_workers=1):
+
+        """
+            1. Definitions and imports ---------------------------------------
+        """
+
+
+        # i) Import libraries
+
+        import numpy as np
+        import threading
+
+
+        # ii) Check and store configuration
+
+        if executor not in ('thread','process'):
+            raise ValueError('Unknown executor {}, use \'thread\' or \'process\''.format(executor))
+
+        self.wavelengths=np.asarray(wavelengths,dtype=float)
+        self.phase_variances=np.asarray(phase_variances,dtype=float)
+        self.optim_opts=optim_opts if executor=='thread' else dict(optim_opts, callback=None)
+        self.n_obs=len(wavelengths)
+
+        self.max_batch_size=max_batch_size
+        self.max_wait=max_wait
+        self.executor_kind=executor
+        self.n_workers=n_workers
+
+
+        # iii) State of the running service
+
+        self._thread_state=threading.local()
+        self._executor=None
+        self._queue=None
+        self._slots=None
+        self._batcher=None
+        self._in_flight=set()
+
+        self.n_requests=0
+        self.n_batches=0
+
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+    async def start(self):
+
+        """
+            2. Start executor and batching task ------------------------------
+        """
+
+
+        # i) Import libraries
+
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+        import Ambiguity_resolution as AR
+
+
+        # ii) Executor with one resolver per thread or process
+
+        if self.executor_kind=='thread':
+            self._executor=ThreadPoolExecutor(max_workers=self.n_workers)
+            self._resolve_chunk=self._resolve_thread_chunk
+        else:
+            self._executor=ProcessPoolExecutor(max_workers=self.n_workers, initializer=AR._Init_parallel_worker,
+                                               initargs=(self.wavelengths, self.phase_variances, self.optim_opts))
+            self._resolve_chunk=AR._Resolve_parallel_chunk
+
+
+        # iii) Queue of requests and background task forming batches
+
+        self._queue=asyncio.Queue()
+        self._slots=asyncio.Semaphore(self.n_workers)
+        self._batcher=asyncio.ensure_future(self._run_batcher())
+
+
+    async def stop(self):
+
+        # Resolve all queued requests, then shut down the executor
+
+        import asyncio
+
+        if self._batcher is None:
+            return
+
+        await self._queue.put(None)
+        await self._batcher
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight)
+
+        self._executor.shutdown(wait=True)
+        self._batcher=None
+        self._executor=None
+
+
+    async def resolve(self, observations):
+
+        # Queue one pixel and wait for its result, non-finite observations are
+        # rejected here so that they do not fail the other requests of a batch
+
+        import asyncio
+        import numpy as np
+        import Ambiguity_resolution as AR
+
+        if self._batcher is None:
+            raise RuntimeError('The service has not been started, call start() or use async with')
+
+        observations=np.asarray(observations).reshape([self.n_obs])
+        AR._Check_phases(np.angle(observations))
+        future=asyncio.get_running_loop().create_future()
+        await self._queue.put((observations,future))
+
+        return await future
+
+
+    async def _run_batcher(self):
+
+        """
+            3. Collect requests ----------------------------------------------
+        """
+
+
+        # i) Import libraries
+
+        import asyncio
+
+
+        # ii) Wait for a first request, then fill the batch until it is full
+        # or the latency budget of the first request is spent
+
+        loop=asyncio.get_running_loop()
+        stopping=False
+
+        while not stopping:
+            request=await self._queue.get()
+            if request is None:
+                break
+
+            batch=[request]
+            deadline=loop.time()+self.max_wait
+
+            while len(batch)<self.max_batch_size:
+                if self._queue.empty():
+                    timeout=deadline-loop.time()
+                    if timeout<=0:
+                        break
+                    try:
+                        request=await asyncio.wait_for(self._queue.get(),timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    request=self._queue.get_nowait()
+
+                if request is None:
+                    stopping=True
+                    break
+                batch.append(request)
+
+
+            # iii) Wait for a free worker and dispatch without blocking
+            # the collection of the next batch
+
+            await self._slots.acquire()
+            task=asyncio.ensure_future(self._dispatch_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+
+    async def _dispatch_batch(self, batch):
+
+        """
+            4. Dispatch batch and resolve futures ----------------------------
+        """
+
+
+        # i) Import libraries
+
+        import asyncio
+        import numpy as np
+
+
+        # ii) Resolve batch in the executor, pass errors on to all requests
+
+        try:
+            observations=np.vstack([request[0] for request in batch])
+            d,N,r=await asyncio.get_running_loop().run_in_executor(self._executor, self._resolve_chunk, observations)
+        except Exception as error:
+            for _,future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        finally:
+            self._slots.release()
+
+
+        # iii) Hand out the rows of the results, skipping cancelled requests
+
+        for k,(_,future) in enumerate(batch):
+            if not future.done():
+                future.set_result((d[k],N[k,:],r[k,:]))
+
+        self.n_requests+=len(batch)
+        self.n_batches+=1
+
+
+    def _resolve_thread_chunk(self, observations):
+
+        # Resolve one batch with the resolver of the current thread
+
+        import Ambiguity_resolution as AR
+
+        resolver=getattr(self._thread_state,'resolver',None)
+        if resolver is None:
+            resolver=AR.Setup_resolver(self.wavelengths, self.phase_variances, self.optim_opts)
+            self._thread_state.resolver=resolver
+
+        return AR.Ambiguity_resolution_batch(observations, self.wavelengths, self.phase_variances,
+                                             self.optim_opts, resolver=resolver)
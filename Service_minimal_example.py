@@ -0,0 +1,127 @@
+"""
+The goal of this script is to illustrate the asyncio resolution service of
+Service_AR with a local in-process producer. Several producer coroutines
+emit pixels one at a time with random interarrival times, as if received from
+a socket, without waiting for the result of a pixel before emitting the next. The latency of the requests and
+the throughput are compared between a service without batching (max_batch_size
+1) and a micro-batching service; the results are checked against a direct call
+of Ambiguity_resolution_batch.
+For this, do the following:
+    1. Definitions and imports
+    2. Simulate data
+    3. Run producers against the service
+    4. Compare results
+
+"""
+
+"""
+    1. Definitions and imports -----------------------------------------------
+"""
+
+
+
+# i) Imports
+
+
+import numpy as np
+import asyncio
+import Ambiguity_resolution as AR
+import Service_AR as sv
+import Support_funs_AR as sf
+import time
+
+
+# ii) Basic definitions
+
+n_obs=10
+n_producers=8
+n_pixels_producer=250
+mean_interarrival=0.001
+seed=0
+
+wavelengths=np.linspace(0.01,0.05,n_obs)
+phase_variances=np.ones([n_obs])*0.01
+optim_opts=sf.Setup_optim_options(n_obs, d_upper=20, backend='lookup')
+
+rng=sf.Setup_rng(seed)
+
+
+
+"""
+    2. Simulate data ---------------------------------------------------------
+"""
+
+
+# i) Pixels and interarrival times of every producer
+
+d_true=rng.uniform(0,10,[n_producers*n_pixels_producer,1])
+observations=sf.Generate_data_noisy_batch(np.ones([1]),d_true,wavelengths,phase_variances,rng=rng)
+observations=observations.reshape([n_producers,n_pixels_producer,n_obs])
+interarrival=rng.exponential(mean_interarrival,[n_producers,n_pixels_producer])
+
+
+
+"""
+    3. Run producers against the service -------------------------------------
+"""
+
+
+# i) A producer sends its pixels one by one and records latencies
+
+async def Request(service, observations_pixel):
+    t_start=time.perf_counter()
+    d,_,_=await service.resolve(observations_pixel)
+    return d, time.perf_counter()-t_start
+
+async def Producer(service, observations_producer, interarrival_producer):
+    requests=[]
+    for k in range(n_pixels_producer):
+        await asyncio.sleep(interarrival_producer[k])
+        requests.append(asyncio.ensure_future(Request(service, observations_producer[k,:])))
+    results=await asyncio.gather(*requests)
+    return np.array([result[0] for result in results]), np.array([result[1] for result in results])
+
+
+# ii) Run all producers concurrently against one service
+
+async def Run_service(max_batch_size, max_wait):
+    async with sv.Resolution_service(wavelengths, phase_variances, optim_opts, max_batch_size=max_batch_size,
+                                     max_wait=max_wait) as service:
+        t_start=time.perf_counter()
+        results=await asyncio.gather(*[Producer(service, observations[k], interarrival[k]) for k in range(n_producers)])
+        t_total=time.perf_counter()-t_start
+    d=np.stack([result[0] for result in results])
+    latency=np.concatenate([result[1] for result in results])
+    return d, latency, t_total, service.n_batches
+
+d_single,latency_single,t_single,n_batches_single=asyncio.run(Run_service(1, 0))
+d_batched,latency_batched,t_batched,n_batches_batched=asyncio.run(Run_service(64, 0.005))
+
+
+# iii) Reference solution for all pixels at once
+
+d_reference,_,_=AR.Ambiguity_resolution_batch(observations.reshape([-1,n_obs]), wavelengths, phase_variances, optim_opts)
+
+
+
+"""
+    4. Compare results -------------------------------------------------------
+"""
+
+
+# i) Print out latencies and throughput
+
+n_requests=n_producers*n_pixels_producer
+
+for name,latency,t_total,n_batches in (('Without batching',latency_single,t_single,n_batches_single),
+                                       ('Micro-batching',latency_batched,t_batched,n_batches_batched)):
+    print(' {:16s} : {} batches, mean batch size {:.1f}, throughput {:.0f} pixels/s'.format(name, n_batches,
+          n_requests/n_batches, n_requests/t_total))
+    print('                    latency p50 {:.2f} ms, p95 {:.2f} ms, p99 {:.2f} ms'.format(
+          *(1000*np.percentile(latency,[50,95,99]))))
+
+
+# ii) Check results against the direct batch call
+
+print(' Maximum difference to Ambiguity_resolution_batch : {}'.format(
+      max(np.max(np.abs(d_single.ravel()-d_reference)),np.max(np.abs(d_batched.ravel()-d_reference)))))
@@ -4,13 +4,22 @@ The functions are:
     Generate_data: Generates a sequence of complex valued observations
     Generate_data_noisy : Generates a sequence of complex valued observations
         which have been impacted by phase noise
+    Generate_data_batch : Generates the observations of Generate_data for a
+        batch of distance configurations at once
+    Generate_data_noisy_batch : Generates noisy observations for a batch of 
+        distance configurations with all noise drawn in one call
+    All four accept dtype='complex64' for a compact single precision path.
+    Objective_sweep: Evaluates the l1 norm of phase residuals for an array of
+        candidate distances at once
+    Setup_rng: Generate a numpy random generator from a seed
+    Spawn_rngs: Generate independent random generators for parallel workers
     Setup_optim_options: Generate a dictionary of optimization options
 """
 
 
 
 
-def Generate_data(weights,distances,wavelengths):
+def Generate_data(weights,distances,wavelengths,dtype='complex128'):
     """
     The goal of this function is to calculate a sequence of complex numbers 
     representing measurements to surfaces S_1, ... , S_n whose backscattering
@@ -38,6 +47,9 @@ def Generate_data(weights,distances,wavelengths):
                         instrument. Used for phase calculation.
     wavelengths         Wavelengths of the waves used to perform    Vector [m]
                         the measurements.
+    dtype               Data type of the measurements, with         'complex128' or
+                        'complex64' the phases are wrapped in       'complex64'
+                        double precision before conversion
                         
                         
     OUTPUTS
@@ -62,12 +74,6 @@ def Generate_data(weights,distances,wavelengths):
     # i) Import packages
     
     import numpy as np
-    
-    
-    # ii) Extract dimensions
-    
-    n=len(weights)
-    m=len(wavelengths)
         
     
     
@@ -76,10 +82,12 @@ def Generate_data(weights,distances,wavelengths):
     """
     
     
-    # i) Measuremens and the matrix C of complex numbers repreenting backscatter
+    # i) Inputs as arrays for broadcasting
     
-    measurements=np.zeros([m],dtype=np.complex)
-    backscatter=np.zeros([n,m],dtype=np.complex)
+    weights=np.asarray(weights)
+    distances=np.asarray(distances)
+    wavelengths=np.asarray(wavelengths)
+    real_dtype=np.finfo(dtype).dtype
     
     
     
@@ -89,18 +97,15 @@ def Generate_data(weights,distances,wavelengths):
     """
     
     
-    # i) Fill the matrix of individual backscatters signals
+    # i) Fill the matrix [n,m] of individual backscatters signals
     
-    for k in range(n):
-        for l in range(m):
-            backscatter[k,l]=weights[k]*np.exp(1j*4*np.pi*distances[k]/wavelengths[l])
+    backscatter=weights[:,np.newaxis].astype(real_dtype)*_Phasors(4*np.pi*distances[:,np.newaxis]/wavelengths[np.newaxis,:],dtype)
     
     
     # ii) Fill the vector of measurements with superpositions of backscattered
     # signals
     
-    for l in range(m):
-        measurements[l]=np.sum(backscatter[:,l])
+    measurements=np.sum(backscatter,axis=0)
     
      
     return measurements,backscatter
@@ -110,7 +115,7 @@ def Generate_data(weights,distances,wavelengths):
     
     
     
-def Generate_data_noisy(weights,distances,wavelengths,phase_variances):
+def Generate_data_noisy(weights,distances,wavelengths,phase_variances,rng=None,dtype='complex128'):
     """
     The goal of this function is to calculate a sequence of complex numbers 
     representing measurements to surfaces S_1, ... , S_n whose backscattering
@@ -119,7 +124,8 @@ def Generate_data_noisy(weights,distances,wavelengths,phase_variances):
     occur simultaneously to all surfaces jointly leading to one complex number
     per wavelength representing the superposition of all backscattered waves.
     Phase noise with differing variances as prescribed in the vector "phase_ 
-    variances" is added onto the measurements
+    variances" is added onto the measurements. The noise is drawn from the 
+    global numpy random state unless a seed or generator "rng" is provided.
     
     For this, do the following:
         1. Imports and definitions
@@ -142,6 +148,11 @@ def Generate_data_noisy(weights,distances,wavelengths,phase_variances):
                         the measurements.
     phase_variances     Phase variances of the noise to be added    Vector [m]
                         onto the superposition of backscatter
+    rng                 Optional seed, SeedSequence or Generator    see Setup_rng
+                        for drawing the noise
+    dtype               Data type of the measurements, with         'complex128' or
+                        'complex64' the phases are wrapped in       'complex64'
+                        double precision before conversion
                         
                         
     OUTPUTS
@@ -170,7 +181,6 @@ def Generate_data_noisy(weights,distances,wavelengths,phase_variances):
     
     # ii) Extract dimensions
     
-    n=len(weights)
     m=len(wavelengths)
         
     
@@ -180,10 +190,12 @@ def Generate_data_noisy(weights,distances,wavelengths,phase_variances):
     """
     
     
-    # i) Measuremens and the matrix C of complex numbers repreenting backscatter
+    # i) Inputs as arrays for broadcasting
     
-    measurements=np.zeros([m],dtype=np.complex)
-    backscatter=np.zeros([n,m],dtype=np.complex)
+    weights=np.asarray(weights)
+    distances=np.asarray(distances)
+    wavelengths=np.asarray(wavelengths)
+    real_dtype=np.finfo(dtype).dtype
     
     
     
@@ -193,19 +205,20 @@ def Generate_data_noisy(weights,distances,wavelengths,phase_variances):
     """
     
     
-    # i) Fill the matrix of individual backscatters signals
+    # i) Fill the matrix [n,m] of individual backscatters signals
     
-    for k in range(n):
-        for l in range(m):
-            backscatter[k,l]=weights[k]*np.exp(1j*4*np.pi*distances[k]/wavelengths[l])
+    backscatter=weights[:,np.newaxis].astype(real_dtype)*_Phasors(4*np.pi*distances[:,np.newaxis]/wavelengths[np.newaxis,:],dtype)
     
     
     # ii) Fill the vector of measurements with superpositions of backscattered
     # signals and add noise
 
     
-    for l in range(m):
-        measurements[l]=np.sum(backscatter[:,l])*np.exp(1j*np.random.normal(0,np.sqrt(phase_variances[l])))
+    if rng is None:
+        phase_noise=np.random.normal(0,np.sqrt(phase_variances),[m])
+    else:
+        phase_noise=Setup_rng(rng).normal(0,np.sqrt(phase_variances),[m])
+    measurements=np.sum(backscatter,axis=0)*_Phasors(phase_noise,dtype)
     
      
     return measurements,backscatter
@@ -216,13 +229,360 @@ def Generate_data_noisy(weights,distances,wavelengths,phase_variances):
     
     
     
-def Setup_optim_options(n_obs, max_iter=300, **constraints):
+def Generate_data_batch(weights,distances,wavelengths,dtype='complex128'):
+    """
+    The goal of this function is to calculate the measurements produced by the
+    function Generate_data for a whole batch of n_cases configurations of 
+    surface distances at once. Each row of the matrix "distances" contains the 
+    distances of the surfaces S_1, ... , S_n for one case; the weights are 
+    either shared by all cases or given per case.
+    
+    For this, do the following:
+        1. Imports and definitions
+        2. Calculate observations
+
+    INPUTS
+    The inputs consist in the weights and distances of the surfaces for all
+    cases and the m-dim vector "wavelengths".
+    
+    Name                 Interpretation                             Type
+    weights             Instensities for the backscattered          Vector [n] or
+                        waves after interacting with S_1,           matrix [n_cases,n]
+                        ... , S_n. Used for complex addition.
+    distances           Distances between scatterers and            Matrix [n_cases,n]
+                        instrument. Used for phase calculation.
+    wavelengths         Wavelengths of the waves used to perform    Vector [m]
+                        the measurements.
+    dtype               Data type of the measurements, with         'complex128' or
+                        'complex64' the phases are wrapped in       'complex64'
+                        double precision before conversion
+                        
+                        
+    OUTPUTS
+    The outputs consist in the complex numbers representing the observed phases 
+    and intensities for all cases.
+    
+    Name                 Interpretation                             Type
+    measurements       The synthetic measurements                   c-matrix [n_cases,m]
+
+
+    """
+    
+    
+    
+    """
+        1. Imports and definitions -------------------------------------------
+    """
+    
+    
+    # i) Import packages
+    
+    import numpy as np
+    
+    
+    # ii) Inputs as arrays for broadcasting
+    
+    distances=np.atleast_2d(distances)
+    weights=np.broadcast_to(weights,distances.shape)
+    wavelengths=np.asarray(wavelengths)
+    
+    
+    
+    """    
+        2. Calculate observations --------------------------------------------
+    """
+    
+    
+    # i) Superpose backscattered signals surface by surface to avoid the
+    # [n_cases,n,m] tensor of individual backscatter
+    
+    measurements=np.zeros([distances.shape[0],len(wavelengths)],dtype=dtype)
+    real_dtype=np.finfo(dtype).dtype
+    
+    for k in range(distances.shape[1]):
+        measurements+=weights[:,k,np.newaxis].astype(real_dtype)*_Phasors(4*np.pi*distances[:,k,np.newaxis]/wavelengths[np.newaxis,:],dtype)
+    
+     
+    return measurements
+    
+    
+    
+    
+    
+    
+    
+def Generate_data_noisy_batch(weights,distances,wavelengths,phase_variances,rng=None,dtype='complex128'):
+    """
+    The goal of this function is to calculate the noisy measurements produced by
+    the function Generate_data_noisy for a whole batch of n_cases configurations
+    of surface distances at once. The phase noise for all cases and wavelengths
+    is drawn in a single call from a numpy random generator so that Monte Carlo
+    runs are reproducible when a seed is provided.
+    
+    For this, do the following:
+        1. Imports and definitions
+        2. Calculate observations
+
+    INPUTS
+    The inputs are the same as for the function Generate_data_batch 
+    complemented by the phase variances and the source of randomness.
+    
+    Name                 Interpretation                             Type
+    weights             Instensities for the backscattered          Vector [n] or
+                        waves after interacting with S_1,           matrix [n_cases,n]
+                        ... , S_n. Used for complex addition.
+    distances           Distances between scatterers and            Matrix [n_cases,n]
+                        instrument. Used for phase calculation.
+    wavelengths         Wavelengths of the waves used to perform    Vector [m]
+                        the measurements.
+    phase_variances     Phase variances of the noise to be added    Vector [m]
+                        onto the superposition of backscatter
+    rng                 Seed, SeedSequence or Generator for         see Setup_rng
+                        drawing the noise
+    dtype               Data type of the measurements, with         'complex128' or
+                        'complex64' the phases are wrapped in       'complex64'
+                        double precision before conversion
+                        
+                        
+    OUTPUTS
+    The outputs consist in the noisy complex numbers representing the observed
+    phases and intensities for all cases.
+    
+    Name                 Interpretation                             Type
+    measurements       The synthetic, noisy measurements            c-matrix [n_cases,m]
+
+
+    """
+    
+    
+    
+    """
+        1. Imports and definitions -------------------------------------------
+    """
+    
+    
+    # i) Import packages
+    
+    import numpy as np
+    
+    
+    # ii) Random generator
+    
+    rng=Setup_rng(rng)
+    
+    
+    
+    """    
+        2. Calculate observations --------------------------------------------
+    """
+    
+    
+    # i) Noise-free measurements
+    
+    measurements=Generate_data_batch(weights,distances,wavelengths,dtype)
+    
+    
+    # ii) Draw phase noise for all cases at once and add it, the noise is
+    # drawn in double precision to keep the random stream of a seed the same
+    # for both precisions
+    
+    phase_noise=rng.normal(0,np.sqrt(phase_variances),measurements.shape)
+    measurements*=_Phasors(phase_noise,dtype)
+    
+     
+    return measurements
+    
+    
+    
+    
+    
+    
+    
+def _Phasors(phases, dtype):
+    
+    # Compute exp(1j*phases) in the complex data type dtype. In single precision
+    # the phases are first wrapped to [0,2pi) in double precision so that their
+    # accuracy of about 2^-24*2pi does not depend on the number of wavecycles;
+    # cos and sin are then written directly into the real and imaginary parts
+    # as they are faster than the complex exponential in single precision
+    
+    import numpy as np
+    
+    if np.dtype(dtype)==np.complex64:
+        phases=np.mod(phases,2*np.pi).astype(np.float32)
+        phasors=np.empty(phases.shape,dtype=np.complex64)
+        np.cos(phases,out=phasors.real)
+        np.sin(phases,out=phasors.imag)
+        return phasors
+    
+    return np.exp(1j*phases)
+    
+    
+    
+    
+    
+    
+    
+def Objective_sweep(observations,distances,wavelengths,phase_weights=None,wrap=True,chunk_size=4096):
+    """
+    The goal of this function is to evaluate the l1 norm of the phase residuals
+    between the observations and the noise-free single surface observations 
+    predicted for a whole array of candidate distances at once. The predicted 
+    phases are formed as a [n_d,m] array by broadcasting; distances are 
+    processed in chunks of chunk_size so that memory stays bounded for long 
+    sweeps.
+    
+    For this, do the following:
+        1. Imports and definitions
+        2. Evaluate objective chunk by chunk
+
+    INPUTS
+    The inputs consist in the observations, the candidate distances, the 
+    wavelengths and options determining the form of the residuals.
+    
+    Name                 Interpretation                             Type
+    observations        Complex observations                        c-vector [m]
+    distances           Candidate distances of a single surface     Vector [n_d]
+    wavelengths         Wavelengths of the waves used to perform    Vector [m]
+                        the measurements.
+    phase_weights       Weights of the absolute phase residuals,    Vector [m] or None
+                        None for equal weights
+    wrap                If True the residuals are wrapped to        boolean
+                        [-pi,pi], else they are the differences of
+                        the phases in [-pi,pi]
+    chunk_size          Number of distances evaluated at once       positive integer
+                        
+                        
+    OUTPUTS
+    The output consists in the values of the objective function for all 
+    candidate distances.
+    
+    Name                 Interpretation                             Type
+    objective          Weighted l1 norms of phase residuals         Vector [n_d]
+
+
+    """
+    
+    
+    
+    """
+        1. Imports and definitions -------------------------------------------
+    """
+    
+    
+    # i) Import packages
+    
+    import numpy as np
+    
+    
+    # ii) Inputs as arrays for broadcasting
+    
+    observations=np.asarray(observations)
+    distances=np.atleast_1d(np.asarray(distances,dtype=float))
+    wavelengths=np.asarray(wavelengths)
+    
+    if phase_weights is None:
+        phase_weights=np.ones([len(wavelengths)])
+    
+    phi_obs=np.angle(observations)
+    objective=np.zeros([len(distances)])
+    
+    
+    
+    """    
+        2. Evaluate objective chunk by chunk ---------------------------------
+    """
+    
+    
+    # i) Predicted observations [chunk_size,m] and residuals
+    
+    for k in range(0,len(distances),chunk_size):
+        observations_pred=np.exp(1j*(4*np.pi*distances[k:k+chunk_size,np.newaxis]/wavelengths[np.newaxis,:]))
+        
+        if wrap:
+            phase_resid=np.angle(np.conj(observations)*observations_pred)
+        else:
+            phase_resid=np.angle(observations_pred)-phi_obs
+        
+        objective[k:k+chunk_size]=np.abs(phase_resid)@phase_weights
+    
+     
+    return objective
+    
+    
+    
+    
+    
+    
+    
+def Setup_rng(seed=None):
+    """
+    The goal of this function is to provide a numpy random generator from any of
+    the usual ways of specifying randomness. An integer or a SeedSequence leads
+    to a reproducible stream, None leads to fresh entropy and an existing 
+    Generator is returned unchanged.
+    
+    Name                 Interpretation                             Type
+    seed                Source of randomness                        None, integer,
+                                                                    SeedSequence or
+                                                                    Generator
+    rng                 The random generator                        Generator
+    
+    """
+    
+    import numpy as np
+    
+    if isinstance(seed,np.random.Generator):
+        return seed
+    
+    return np.random.default_rng(seed)
+    
+    
+    
+    
+    
+    
+    
+def Spawn_rngs(seed, n_streams):
+    """
+    The goal of this function is to split one seed into n_streams statistically
+    independent random generators, e.g. one per parallel worker or per chunk of
+    trials. The same seed always leads to the same streams, independently of the
+    order in which the streams are used.
+    
+    Name                 Interpretation                             Type
+    seed                Source of randomness                        None, integer or
+                                                                    SeedSequence
+    n_streams           Number of generators to create              positive integer
+    rngs                The independent random generators           list of Generator
+    
+    """
+    
+    import numpy as np
+    
+    if not isinstance(seed,np.random.SeedSequence):
+        seed=np.random.SeedSequence(seed)
+    
+    return [np.random.default_rng(child) for child in seed.spawn(n_streams)]
+    
+    
+    
+    
+    
+    
+    
+def Setup_optim_options(n_obs, max_iter=300, backend='milp', d_lower=0, d_upper=None, N_lower=0, N_upper=None, solver=None, solver_options=None, **constraints):
     """
     The goal of this function is to set up the options dictionary optim_options
     for the optimization to be carried out during ambiguity resolution or
     unmixing. It can be called without any input arguments to generate the
     options necessary to perform unbounded estimation with standard values 
-    regarding convergence and nr of iterations.
+    regarding convergence and nr of iterations. Bounds on d and N can be given 
+    either in structured form as numbers or vectors, stored in the entry 
+    "bounds", or as constraint strings; only the strings passed by the caller
+    are stored in the entry "constraints". Both are compiled into vectorized
+    constraints once per configuration, see Ambiguity_resolution.
+    Compile_bounds.
     
     For this, do the following:
         1. Imports and definitions
@@ -237,7 +597,20 @@ def Setup_optim_options(n_obs, max_iter=300, **constraints):
     n_obs               Dimension of the problem, i.e. number       positive integer
                         of observations
     max_iter            Number of iterations not exceeded           positive integer
-                        during optimization
+                        during optimization, only applies to the
+                        solver GLPK_MI, see Solver_arguments
+    backend             Method of solution, one of 'milp',          string
+                        'enumeration', 'fast_path', 'stream',
+                        'scipy_milp', 'lookup' or 'coarse_to_fine',
+                        see Ambiguity_resolution.Setup_resolver
+    d_lower, d_upper    Lower and upper bound on the distance,      real numbers
+                        None or inf for no upper bound
+    N_lower, N_upper    Lower and upper bounds on the wave-         real numbers or
+                        cycles, None or inf for no bound            vectors [n_obs]
+    solver              Mixed integer solver, None for the          string
+                        fastest installed one
+    solver_options      Options like 'time_limit', 'mip_gap' and    dictionary
+                        'threads', see Solver_arguments
     constraints         List containing expressions for the bounds
                         e.g. ['d_opt>=10']
                         
@@ -271,12 +644,18 @@ def Setup_optim_options(n_obs, max_iter=300, **constraints):
     """
     
     
-    # i) Create string list of constraints
+    # i) Structured bounds
+    
+    bounds={'d_lower' : d_lower,
+            'd_upper' : np.inf if d_upper is None else d_upper,
+            'N_lower' : np.broadcast_to(-np.inf if N_lower is None else N_lower,[n_obs]).astype(float),
+            'N_upper' : np.broadcast_to(np.inf if N_upper is None else N_upper,[n_obs]).astype(float)}
+    
     
-    cons=['d_opt>=0']
+    # ii) Only constraint strings passed by the caller, the structured bounds
+    # are not repeated as strings
     
-    for k in range(n_obs):
-        cons=cons+['N_opt[{}]>=0'.format(k)]
+    cons=[]
     
     for key,value in constraints.items():
         cons=cons+value    
@@ -294,6 +673,10 @@ def Setup_optim_options(n_obs, max_iter=300, **constraints):
     optim_options={}
     optim_options['max_iter']=max_iter
     optim_options['constraints']=cons
+    optim_options['backend']=backend
+    optim_options['bounds']=bounds
+    optim_options['solver']=solver
+    optim_options['solver_options']=solver_options if solver_options is not None else {}
     
      
     return optim_options